@@ -11,8 +11,6 @@ import sys
 sys.path.insert(0, os.path.abspath("../.."))
 sys.path.insert(0, os.path.abspath("../../src"))
 
-import pypedream  # noqa
-
 project = "pypedream"
 copyright = "2024, Apostolos Geyer"
 author = "Apostolos Geyer"
@@ -5,24 +5,55 @@ rule #2 is don't forget rule #1
 rule #3 is dont ask me where the unit tests are, there are none.
 
 #readthedocs
+
+nothing is imported until you ask for it. `import pypedream` only loads this file, the first access of a
+name in `__all__` imports the submodule that defines it and caches the result in the module globals, so
+every access after that is a plain global lookup (PEP 562).
+
+`core` and `exceptions` are bound to modules that are registered but not executed (`importlib.util.LazyLoader`),
+their code only runs the first time one of their attributes is used, so `from pypedream.core import stages` or
+`pypedream.exceptions.ExitPipeline` work as usual.
+
+set `PYPEDREAM_EAGER_IMPORT=1` in the environment to resolve everything at import time instead, which is
+handy for debugging or making sure the lazy table isn't lying.
 """
-from . import core as core
-from . import exceptions
-from . import ctx
-from .core.pipelines import Parameters, Pipeline, Variables
-from .core.stages import (
-    Stage,
-    Input,
-    InputBinding,
-    DependencyInputMapper,
-    KeyedInputMapper,
-    KeyedOutputMapper,
-    SequentialOutputMapper,
-    StageInputs,
-    StageKey,
-    StageOutputs,
-    StageTable,
-)
+import importlib
+import importlib.util
+import os
+import sys
+
+# names exported from each submodule, the first access of any of them imports the module and caches
+# the whole group so the rest of the group never has to go through __getattr__
+_EXPORTS: dict[str, frozenset[str]] = {
+    "pypedream.core.stages": frozenset(
+        {
+            "Stage",
+            "StageInputs",
+            "StageKey",
+            "StageOutputs",
+            "StageTable",
+            "SequentialOutputMapper",
+            "InputBinding",
+            "KeyedOutputMapper",
+            "KeyedInputMapper",
+            "DependencyInputMapper",
+            "Input",
+        }
+    ),
+    "pypedream.core.pipelines": frozenset({"Pipeline", "Variables", "Parameters"}),
+}
+
+# public name -> module that defines it
+_LAZY: dict[str, str] = {
+    name: module for module, names in _EXPORTS.items() for name in names
+}
+
+# submodules that are exported as attributes of the package
+_SUBMODULES: dict[str, str] = {
+    "exceptions": "pypedream.exceptions",
+    "ctx": "pypedream.ctx",
+    "core": "pypedream.core",
+}
 
 __all__ = [
     "Stage",
@@ -43,3 +74,44 @@ __all__ = [
     "ctx",
     "core",
 ]
+
+
+def __getattr__(name: str):
+    if (modname := _SUBMODULES.get(name)) is not None:
+        module = globals()[name] = importlib.import_module(modname)
+        return module
+
+    if (modname := _LAZY.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(modname)
+    globals().update({export: getattr(module, export) for export in _EXPORTS[modname]})
+    return globals()[name]
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY) | set(_SUBMODULES))
+
+
+def _lazy_submodule(fullname: str):
+    """
+    Register the submodule `fullname` in `sys.modules` without executing it, it is executed on first attribute access.
+    """
+    if (module := sys.modules.get(fullname)) is not None:
+        return module
+
+    spec = importlib.util.find_spec(fullname)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[fullname] = module
+    loader.exec_module(module)
+    return module
+
+
+if os.environ.get("PYPEDREAM_EAGER_IMPORT") == "1":  # pragma: no cover
+    for _name in (*_SUBMODULES, *_LAZY):
+        __getattr__(_name)
+else:
+    core = _lazy_submodule("pypedream.core")
+    exceptions = _lazy_submodule("pypedream.exceptions")
@@ -8,33 +8,171 @@ These context variables can also be used within the body of stage functions to a
 pipeline, and modify them. However, this may be dangerous. It is recommended only to modify the `VARIABLES` at
 most. Good use of the context variables is in deferred input bindings (bindings of inputs for stages that are
 evaluated at stage execution time rather than pipeline construction time)
+
+All of the pipeline state lives in a single `PipelineCtx` stored in the one `ContextVar` `CTX`, so setting up the
+context for a pipeline is one `.set()` rather than one per variable. `PIPELINE`, `VARIABLES`, `PARAMETERS`, `STAGES`,
+`STAGE` and `LOG` are views of the fields of that object with the same `get`/`set`/`reset` interface as a `ContextVar`,
+so they can still be used anywhere a `ContextVar` was used before (e.g `InputBinding.contextual`).
 """
 
+from __future__ import annotations
+
 import logging
-from typing import TYPE_CHECKING, Any
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Generic, Iterator, TypeVar
 from contextvars import ContextVar
-from pypedream.core.logs import BASE_LOGGER
+
+from attrs import evolve, field, frozen
 
 if TYPE_CHECKING:  # pragma: no cover
     from pypedream.core.pipelines import Pipeline, Variables, Parameters
     from pypedream.core.stages import Stage, StageTable
-else:
-    Pipeline = Variables = Parameters = Stage = StageTable = Any
 
-PIPELINE: ContextVar[Pipeline | None] = ContextVar("pipeline")
-VARIABLES: ContextVar[Variables | None] = ContextVar("variables")
-PARAMETERS: ContextVar[Parameters | None] = ContextVar("parameters")
-STAGES: ContextVar[StageTable | None] = ContextVar("stages")
-STAGE: ContextVar[Stage | None] = ContextVar("stage")
-LOG: ContextVar[logging.Logger | None] = ContextVar("logger")
+T = TypeVar("T")
 
 
-def applydefaults():
-    PIPELINE.set(None)
-    VARIABLES.set(None)
-    PARAMETERS.set(None)
-    STAGE.set(None)
-    LOG.set(BASE_LOGGER)
+@frozen
+class PipelineCtx:
+    """
+    Everything a stage might need to know about the pipeline it is running in.
+
+    Attributes
+    ----------
+    pipeline : Pipeline | None
+        the pipeline currently running
+
+    variables : Variables | None
+        the variables of the pipeline
+
+    parameters : Parameters | None
+        the parameters of the pipeline
+
+    stages : StageTable | None
+        the stage table of the pipeline
+
+    stage : Stage | None
+        the stage currently running
+
+    log : logging.Logger | None
+        the logger of the pipeline
+    """
+
+    pipeline: Pipeline | None = None
+    variables: Variables | None = None
+    parameters: Parameters | None = None
+    stages: StageTable | None = None
+    stage: Stage | None = None
+    log: logging.Logger | None = None
+
+
+CTX: ContextVar[PipelineCtx] = ContextVar("pypedream_ctx", default=PipelineCtx())
+
+
+@contextmanager
+def update_ctx(**changes: Any) -> Iterator[PipelineCtx]:
+    """
+    Replace any number of fields of the pipeline context for the duration of a with block, with one `.set()` on
+    the way in and one `.reset()` on the way out no matter how many fields are changed.
+
+    Parameters
+    ----------
+    changes : Any
+        the fields of `PipelineCtx` to replace, and their values
+
+    Yields
+    ------
+    PipelineCtx
+        the updated context
+    """
+    updated = evolve(CTX.get(), **changes)
+    token = CTX.set(updated)
+    try:
+        yield updated
+    finally:
+        CTX.reset(token)
+
+
+@frozen
+class ContextFieldToken(Generic[T]):
+    """
+    Returned by `ContextField.set`, holds what the field was before so it can be put back by `ContextField.reset`.
+    """
 
+    var: ContextField[T]
+    old_value: T | None
 
-applydefaults()
+
+@frozen
+class ContextField(Generic[T]):
+    """
+    A `ContextVar` like view of a single field of the `PipelineCtx` stored in `CTX`.
+
+    Attributes
+    ----------
+    name : str
+        the name of the field of `PipelineCtx`
+
+    fallback : Callable[[], T] | None
+        called by `get` for a value when the field is not set and no default is given
+    """
+
+    name: str
+    fallback: Callable[[], T] | None = field(default=None, eq=False)
+
+    def get(self, default: T | None = None) -> T | None:
+        """
+        Returns
+        -------
+        the value of the field in the current context, or `default` if it is not set
+        """
+        value = getattr(CTX.get(), self.name)
+        if value is not None:
+            return value
+        if default is None and self.fallback is not None:
+            return self.fallback()
+        return default
+
+    def set(self, value: T | None) -> ContextFieldToken[T]:
+        """
+        Set the field in the current context.
+
+        Returns
+        -------
+        a token that can be passed to `reset` to restore the previous value
+        """
+        current = CTX.get()
+        CTX.set(evolve(current, **{self.name: value}))
+        return ContextFieldToken(self, getattr(current, self.name))
+
+    def reset(self, token: ContextFieldToken[T]) -> None:
+        """
+        Restore the field to the value it had before the `set` call that returned `token`.
+        """
+        if token.var is not self:
+            raise ValueError(f"{token!r} was created by a different ContextField")
+        CTX.set(evolve(CTX.get(), **{self.name: token.old_value}))
+
+
+PIPELINE: ContextField[Pipeline] = ContextField("pipeline")
+VARIABLES: ContextField[Variables] = ContextField("variables")
+PARAMETERS: ContextField[Parameters] = ContextField("parameters")
+STAGES: ContextField[StageTable] = ContextField("stages")
+STAGE: ContextField[Stage] = ContextField("stage")
+
+
+def _base_logger() -> logging.Logger:
+    # imported here so that importing this module doesn't import structlog
+    from pypedream.core import logs
+
+    return logs.BASE_LOGGER
+
+
+LOG: ContextField[logging.Logger] = ContextField("log", fallback=_base_logger)
+
+
+def applydefaults():
+    """
+    Clear everything set in the pipeline context of the current `contextvars.Context`.
+    Nothing has to be set for the context to be usable, `CTX` has a default and `LOG` falls back to the base logger.
+    """
+    CTX.set(PipelineCtx())
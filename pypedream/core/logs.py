@@ -45,13 +45,17 @@ def logging_context(**kw):
     return bound_contextvars(**kw)
 
 
-DEFAULT_SHARED_PROCESSORS: list[structlog.types.Processor] = [
+LOG_FILE_TIME_FORMAT = "%Y%m%dT%H%M%S"
+
+_EXTRA_ADDER = ExtraAdder()
+
+DEFAULT_SHARED_PROCESSORS: tuple[structlog.types.Processor, ...] = (
     structlog.contextvars.merge_contextvars,
     add_log_level,
     ProcessorFormatter.wrap_for_formatter,
-]
+)
 
-DEFAULT_FILE_PROCESSORS: list[structlog.types.Processor] = [
+DEFAULT_FILE_PROCESSORS: tuple[structlog.types.Processor, ...] = (
     ProcessorFormatter.remove_processors_meta,
     dict_tracebacks,
     CallsiteParameterAdder(
@@ -63,29 +67,121 @@ DEFAULT_FILE_PROCESSORS: list[structlog.types.Processor] = [
     ),
     TimeStamper(fmt="iso", utc=False),
     JSONRenderer(),
-]
+)
 
-DEFAULT_CONSOLE_PROCESSORS: list[structlog.types.Processor] = [
+DEFAULT_CONSOLE_PROCESSORS: tuple[structlog.types.Processor, ...] = (
     ProcessorFormatter.remove_processors_meta,
     PositionalArgumentsFormatter(),
     StackInfoRenderer(),
     TimeStamper(fmt="%Y-%m-%d %H:%M:%S", utc=False),
     add_logger_name,
     ConsoleRenderer(),
-]
-
-DEFAULT_CONSOLE_FORMATTER = ProcessorFormatter(
-    processors=DEFAULT_CONSOLE_PROCESSORS,
-    foreign_pre_chain=[*DEFAULT_SHARED_PROCESSORS, ExtraAdder()],
 )
 
-DEFAULT_FILE_FORMATTER = ProcessorFormatter(
-    processors=DEFAULT_FILE_PROCESSORS,
-    foreign_pre_chain=[*DEFAULT_SHARED_PROCESSORS, ExtraAdder()],
-)
+_CONSOLE_FORMATTER: ProcessorFormatter | None = None
+_FILE_FORMATTER: ProcessorFormatter | None = None
+
+
+def _get_console_formatter() -> ProcessorFormatter:
+    """
+    Build the default console formatter on first use and cache it.
+    """
+    global _CONSOLE_FORMATTER
+    if _CONSOLE_FORMATTER is None:
+        _CONSOLE_FORMATTER = ProcessorFormatter(
+            processors=DEFAULT_CONSOLE_PROCESSORS,
+            foreign_pre_chain=(*DEFAULT_SHARED_PROCESSORS, _EXTRA_ADDER),
+        )
+    return _CONSOLE_FORMATTER
+
+
+def _get_file_formatter() -> ProcessorFormatter:
+    """
+    Build the default file formatter on first use and cache it.
+    """
+    global _FILE_FORMATTER
+    if _FILE_FORMATTER is None:
+        _FILE_FORMATTER = ProcessorFormatter(
+            processors=DEFAULT_FILE_PROCESSORS,
+            foreign_pre_chain=(*DEFAULT_SHARED_PROCESSORS, _EXTRA_ADDER),
+        )
+    return _FILE_FORMATTER
+
+
+_defaults_installed = False
+
+
+def _ensure_defaults() -> None:
+    """
+    Reset structlog to its stdlib defaults, once per process. This is only called when pypedream actually hands out a
+    logger, so just importing pypedream never touches the global structlog configuration.
+    """
+    global _defaults_installed
+    if _defaults_installed:
+        return
+    structlog.stdlib.recreate_defaults()
+    _defaults_installed = True
+
+
+class _LazyLogger:
+    """
+    Stand in for the base pypedream logger. structlog is reset to its stdlib defaults and the real logger is created
+    the first time an attribute of the proxy is accessed (i.e the first time something is logged with it), every
+    attribute access after that goes straight to the real logger.
+    """
+
+    __slots__ = ("_real",)
+
+    def __init__(self):
+        self._real = None
+
+    def __getattr__(self, name: str) -> Any:
+        real = self._real if self._real is not None else self._resolve()
+        return getattr(real, name)
+
+    def _resolve(self):
+        _ensure_defaults()
+        self._real = structlog.get_logger("pypedream")
+        return self._real
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"_LazyLogger(real={self._real!r})"
+
+
+BASE_LOGGER = _LazyLogger()
 
-structlog.stdlib.recreate_defaults()
-BASE_LOGGER = structlog.get_logger("pypedream")
+_LAZY_ATTRS = {
+    "DEFAULT_CONSOLE_FORMATTER": _get_console_formatter,
+    "DEFAULT_FILE_FORMATTER": _get_file_formatter,
+}
+
+
+def __getattr__(name: str):
+    # the formatters used to be built at import time, they are now built when first accessed
+    if (factory := _LAZY_ATTRS.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = globals()[name] = factory()
+    return value
+
+
+def _resolve_log_path(
+    file: bool | Path | PathLike | str, log_dir: Path | PathLike, name: str
+) -> Path | PathLike:
+    """
+    Resolve the `file` argument of `stdstructlogger` to the path of the log file. `file` is assumed to be truthy,
+    the timestamp for the default file name is only computed when it is needed.
+    """
+    match file:
+        case Path() | PathLike():
+            return file
+        case str():
+            return Path(log_dir, file)
+        case _:
+            return Path(
+                log_dir,
+                f"{name}_{datetime.datetime.now().strftime(LOG_FILE_TIME_FORMAT)}.log",
+            )
 
 
 def stdstructlogger(
@@ -98,6 +194,9 @@ def stdstructlogger(
     """
     Get a structlog logger using stdlib loggers with the specified name and configure it.
 
+    The first call (or the first use of `BASE_LOGGER`) resets structlog to its stdlib defaults, nothing in structlog's
+    global configuration is touched before pypedream actually hands out a logger.
+
     Parameters
     ----------
     name : str
@@ -112,7 +211,7 @@ def stdstructlogger(
         The directory to write log files to. This is only used if file is True or a string. Defaults to the current working directory.
 
     file : bool | Path | PathLike | str
-        If True, a structlog logger will be created to write json logs to a file named '{name}_{datetime.datetime.now().isoformat()}.log' in the specified log_dir.
+        If True, a structlog logger will be created to write json logs to a file named '{name}_{datetime.datetime.now().strftime(LOG_FILE_TIME_FORMAT)}.log' in the specified log_dir.
         If False, no file logger will be added.
         If it is a Path or PathLike object, the logger will write json logs to the specified file, ignoring the log_dir parameter.
         If it is a string, the logger will write json logs to a file named '{file}' in the specified log_dir.
@@ -127,6 +226,7 @@ def stdstructlogger(
     structlog.stdlib.BoundLogger
         A structlog logger configured with the specified handlers.
     """
+    _ensure_defaults()
 
     logger = logging.getLogger(name)
     logger.propagate = False
@@ -144,21 +244,14 @@ def stdstructlogger(
             if stream is not True
             else logging.StreamHandler()
         )
-        console_handler.setFormatter(DEFAULT_CONSOLE_FORMATTER)
+        console_handler.setFormatter(_get_console_formatter())
         logger.addHandler(console_handler)
 
     if file:
-        if isinstance(file, (Path, PathLike)):
-            file_path = file
-        elif isinstance(file, str):
-            file_path = Path(log_dir, file)
-        else:
-            file_path = Path(
-                log_dir, f"{name}_{datetime.datetime.now().isoformat()}.log"
-            )
-
-        file_handler = logging.FileHandler(str(file_path), mode="a")
-        file_handler.setFormatter(DEFAULT_FILE_FORMATTER)
+        file_handler = logging.FileHandler(
+            str(_resolve_log_path(file, log_dir, name)), mode="a"
+        )
+        file_handler.setFormatter(_get_file_formatter())
         logger.addHandler(file_handler)
 
     return structlog.wrap_logger(
@@ -170,6 +263,7 @@ __all__ = [
     "stdstructlogger",
     "logging_context",
     "BASE_LOGGER",
+    "LOG_FILE_TIME_FORMAT",
     "DEFAULT_CONSOLE_FORMATTER",
     "DEFAULT_FILE_FORMATTER",
     "DEFAULT_CONSOLE_PROCESSORS",
@@ -1,12 +1,15 @@
 import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import logging
-from collections.abc import MutableMapping
-from typing import Any, Callable, Iterable, ParamSpec, TypeVar
+import sys
+from collections.abc import ItemsView, KeysView, Mapping, MutableMapping, ValuesView
+from types import MappingProxyType
+from typing import Any, Callable, ClassVar, Iterable, ParamSpec, TypeVar
 from os import PathLike
 from pathlib import Path
 import structlog
 
-from attrs import define, field, Factory
+from attrs import define, evolve, field, setters, Factory
 from pypedream.core import context
 from pypedream.core.logs import stdstructlogger, logging_context
 from pypedream.core.stages import (
@@ -20,21 +23,65 @@ __all__ = [
     "Parameters",
     "Variables",
     "ExitPipeline",
+    "UNSET_PARAMETER",
+    "UNSET_VARIABLE",
 ]
 
 P = ParamSpec("P")
 R = TypeVar("R")
 
 
+class _UnsetType:
+    """
+    Type of the `UNSET_PARAMETER` and `UNSET_VARIABLE` sentinels, there is only ever one instance per name so they
+    are always compared with `is`.
+    """
+
+    __slots__ = ("_name",)
+    _instances: ClassVar[dict[str, "_UnsetType"]] = {}
+
+    def __new__(cls, name: str) -> "_UnsetType":
+        if (instance := cls._instances.get(name)) is None:
+            instance = cls._instances[name] = super().__new__(cls)
+            instance._name = name
+        return instance
+
+    def __repr__(self) -> str:
+        return self._name
+
+    def __reduce__(self) -> str:
+        # pickled by name so unpickling gives back the same instance
+        return self._name
+
+
+# returned by Parameters.get / Variables.get for names with no value, compare with `is`
+UNSET_PARAMETER = _UnsetType("UNSET_PARAMETER")
+UNSET_VARIABLE = _UnsetType("UNSET_VARIABLE")
+
+
 class ExitPipeline(Exception):
     """
     Exception to exit the pipeline
+
+    Attributes
+    ----------
+    message : str
+        why the pipeline exited, also the exception's only arg
+
+    error : bool
+        whether the pipeline exited because of an error
     """
 
-    def __init__(self, message: str, *args, error: bool = False):
+    __slots__ = ("message", "error")
+
+    def __init__(self, message: str, error: bool = False):
+        Exception.__init__(self, message)
         self.message = message
         self.error = error
-        super().__init__(*args)
+
+    def __reduce__(self):
+        # error isn't in args, without this pickle and copy rebuild it as a clean exit
+        return (type(self), (self.message, self.error))
 
 
 class InvalidParameterException(KeyError):
@@ -55,9 +102,8 @@ class UndefinedVariableException(KeyError):
     """
 
 
-@define
+@define(slots=True, weakref_slot=False, eq=False)
 class Parameters(MutableMapping[str, Any]):
-    UNSET_PARAMETER = "UNSET_PARAMETER"
     """
     A class to manage the parameters of a pipeline
 
@@ -66,14 +112,14 @@ class Parameters(MutableMapping[str, Any]):
 
     Attributes
     ----------
-    parameter_set: Iterable[str]
-        a set of allowed parameter names
+    parameter_set: frozenset[str]
+        a set of allowed parameter names, any iterable passed in is converted to a frozenset
 
     parameters: dict[str, Any]
         a dictionary of parameter names and values
 
-    defaults: dict[str, Any]
-        a dictionary of default values for the parameters
+    defaults: Mapping[str, Any]
+        a dictionary of default values for the parameters, read only when created with `define`
 
     Methods
     -------
@@ -89,21 +135,29 @@ class Parameters(MutableMapping[str, Any]):
     get(name: str, must: bool = False) -> Any
         gets a parameter from the pipeline.
         If the parameter is not in the parameter set it will error.
-        If the parameter is not found, it will return UNSET_PARAMETER or error if must is True
+        If the parameter is not found, it will return UNSET_PARAMETER (a unique object, compare with `is`) or error if must is True
 
     reset()
         Resets the values of all parameters, does not modify the parameter set.
 
     __getitem__(name: str) -> Any
-        identical to get with dict like access but must is always false and
-        will return UNSET_PARAMETER if the parameter is not found
+        identical to get with dict like access but must is always true, so it raises
+        if the parameter is not found
 
     __setitem__(name: str, value: Any) -> None
         identical to set with dict like access
     """
-    parameter_set: Iterable[str] = field(factory=set)
+
+    UNSET_PARAMETER: ClassVar[_UnsetType] = UNSET_PARAMETER
+
+    # compared and hashed by identity like the pipeline that owns them, Mapping's __eq__ would compare contents
+    # (even against a plain dict) and leave them unhashable
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    parameter_set: frozenset[str] = field(factory=frozenset, converter=frozenset)
     parameters: dict[str, Any] = field(factory=dict)
-    defaults: dict[str, Any] = field(default={})
+    defaults: Mapping[str, Any] = field(factory=dict)
 
     @classmethod
     def define(
@@ -128,9 +182,8 @@ class Parameters(MutableMapping[str, Any]):
         for the parameters when `reset` is used.
 
         """
-        parameter_set = parameter_set or set()
-        parameter_set = set(parameter_set).union(set(defaults.keys()))
-        pp = cls(parameter_set=parameter_set, defaults=defaults)
+        parameter_set = frozenset(parameter_set or ()).union(defaults)
+        pp = cls(parameter_set=parameter_set, defaults=MappingProxyType(defaults))
         pp.sets(**defaults)
         return pp
 
@@ -154,9 +207,9 @@ class Parameters(MutableMapping[str, Any]):
 
         :param kwargs: a dictionary of parameters and values
         """
-        if any(name not in self.parameter_set for name in kwargs):
+        if missing := kwargs.keys() - self.parameter_set:
             raise InvalidParameterException(
-                f"Attempting to set parameters {[name for name in kwargs if name not in self.parameter_set]} not found in pipeline parameters"
+                f"Attempting to set parameters {sorted(missing)} not found in pipeline parameters"
             )
 
         self.parameters.update(kwargs)
@@ -173,25 +226,33 @@ class Parameters(MutableMapping[str, Any]):
             raise InvalidParameterException(
                 f"Attempting to retrieve undeclared parameter {name} from pipeline parameters"
             )
-        match (
-            value := self.parameters.get(
-                name,
-                (check := (default if default is not None else self.UNSET_PARAMETER)),
-            ),
-            must,
-        ):
-            case (v, True) if v == check:
-                raise UndefinedParameterException(
-                    f"Declared paramater {name} has not been defined"
-                )
-            case (_, _):
-                return value
+        sentinel = UNSET_PARAMETER if default is None else default
+        value = self.parameters.get(name, sentinel)
+        if must and value is sentinel:
+            raise UndefinedParameterException(
+                f"Declared paramater {name} has not been defined"
+            )
+        return value
 
     def __getitem__(self, name: str) -> Any:
-        return self.get(name, must=True)
+        # same as get(name, must=True) but a set parameter is a single dict lookup
+        try:
+            return self.parameters[name]
+        except KeyError:
+            if name not in self.parameter_set:
+                raise InvalidParameterException(
+                    f"Attempting to retrieve undeclared parameter {name} from pipeline parameters"
+                ) from None
+            raise UndefinedParameterException(
+                f"Declared paramater {name} has not been defined"
+            ) from None
 
     def __setitem__(self, name: str, value: Any) -> None:
-        self.set(name, value)
+        if name not in self.parameter_set:
+            raise InvalidParameterException(
+                f"Attempting to set parameter {name} not found in pipeline parameters"
+            )
+        self.parameters[name] = value
 
     def __delitem__(self, name: str) -> None:
         del self.parameters[name]
@@ -202,17 +263,30 @@ class Parameters(MutableMapping[str, Any]):
     def __len__(self) -> int:
         return len(self.parameters)
 
+    # the MutableMapping mixins would go through __getitem__ / __iter__, go straight to the dict instead
+    def __contains__(self, name: object) -> bool:
+        return name in self.parameters
+
+    def keys(self) -> KeysView[str]:
+        return self.parameters.keys()
+
+    def values(self) -> ValuesView[Any]:
+        return self.parameters.values()
+
+    def items(self) -> ItemsView[str, Any]:
+        return self.parameters.items()
+
     def reset(self):
         """
-        Clears the values of all parameters, does not modify the parameter set.
+        Resets the values of all parameters to their defaults, does not modify the parameter set.
         """
-        self.parameters = self.PARAMATERS_FACTORY()
-        self.sets(**self.defaults)
+        # defaults were validated against the parameter set by define, no need to go through sets
+        self.parameters.clear()
+        self.parameters.update(self.defaults)
 
 
-@define
+@define(slots=True, weakref_slot=False, eq=False)
 class Variables(MutableMapping[str, Any]):
-    UNSET_VARIABLE = "UNSET_VARIABLE"
     """
     A class to manage the variables of a pipeline. Variables are values that can be modified during a pipeline run and are
     not set directly in the pipeline parameters. There is no "variable set" because variables can be added and removed at any time.
@@ -223,8 +297,8 @@ class Variables(MutableMapping[str, Any]):
     variables: dict[str, Any]
         a dictionary of variable names and values
 
-    defaults: dict[str, Any]
-        a dictionary of default values for the variables
+    defaults: Mapping[str, Any]
+        a dictionary of default values for the variables, read only when created with `define`
 
     Methods
     -------
@@ -239,22 +313,29 @@ class Variables(MutableMapping[str, Any]):
 
     get(name: str, must: bool = False) -> Any
         gets a variable from the pipeline
-        If the variable is not found, it will return UNSET_VARIABLE or error if must is True
+        If the variable is not found, it will return UNSET_VARIABLE (a unique object, compare with `is`) or error if must is True
 
     reset()
         Clears the values of all variables
 
     __getitem__(name: str) -> Any
-        identical to get with dict like access but must is always false and
-        will return UNSET_VARIABLE if the variable is not found
+        identical to get with dict like access but must is always true, so it raises
+        if the variable is not found
 
     __setitem__(name: str, value: Any) -> None
         identical to set with dict like access
 
     """
 
+    UNSET_VARIABLE: ClassVar[_UnsetType] = UNSET_VARIABLE
+
+    # compared and hashed by identity like the pipeline that owns them, Mapping's __eq__ would compare contents
+    # (even against a plain dict) and leave them unhashable
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
     variables: dict[str, Any] = field(factory=dict)
-    defaults: dict[str, Any] = field(default={})
+    defaults: Mapping[str, Any] = field(factory=dict)
 
     @classmethod
     def define(cls, **defaults: Any) -> "Variables":
@@ -273,7 +354,7 @@ class Variables(MutableMapping[str, Any]):
         for the variables when `reset` is used.
 
         """
-        pv = cls(defaults=defaults)
+        pv = cls(defaults=MappingProxyType(defaults))
         pv.sets(**defaults)
         return pv
 
@@ -297,25 +378,25 @@ class Variables(MutableMapping[str, Any]):
         :param must: whether to raise an error if the variable is not found
         :returns: the value of the variable
         """
-        match (
-            value := self.variables.get(
-                name,
-                (check := (default if default is not None else self.UNSET_VARIABLE)),
-            ),
-            must,
-        ):
-            case (v, True) if v == check:
-                raise UndefinedVariableException(
-                    f"Variable {name} not found in pipeline variables"
-                )
-            case (_, _):
-                return value
+        sentinel = UNSET_VARIABLE if default is None else default
+        value = self.variables.get(name, sentinel)
+        if must and value is sentinel:
+            raise UndefinedVariableException(
+                f"Variable {name} not found in pipeline variables"
+            )
+        return value
 
     def __getitem__(self, name: str) -> Any:
-        return self.get(name, must=True)
+        # same as get(name, must=True) but a set variable is a single dict lookup
+        try:
+            return self.variables[name]
+        except KeyError:
+            raise UndefinedVariableException(
+                f"Variable {name} not found in pipeline variables"
+            ) from None
 
     def __setitem__(self, name: str, value: Any) -> None:
-        self.set(name, value)
+        self.variables[name] = value
 
     def __delitem__(self, name: str) -> None:
         del self.variables[name]
@@ -326,15 +407,51 @@ class Variables(MutableMapping[str, Any]):
     def __len__(self) -> int:
         return len(self.variables)
 
+    # the MutableMapping mixins would go through __getitem__ / __iter__, go straight to the dict instead
+    def __contains__(self, name: object) -> bool:
+        return name in self.variables
+
+    def keys(self) -> KeysView[str]:
+        return self.variables.keys()
+
+    def values(self) -> ValuesView[Any]:
+        return self.variables.values()
+
+    def items(self) -> ItemsView[str, Any]:
+        return self.variables.items()
+
     def reset(self):
         """
-        Clears the values of all variables
+        Resets the values of all variables to their defaults
         """
-        self.variables = self.VARIABLES_FACTORY()
-        self.sets(**self.defaults)
+        self.variables.clear()
+        self.variables.update(self.defaults)
+
+
+def _handlers_tuple(
+    handlers: Iterable[logging.Handler] | None,
+) -> tuple[logging.Handler, ...] | None:
+    # immutable so the only way to change the handlers is to reassign them, which drops the built logger
+    return None if handlers is None else tuple(handlers)
+
 
+def _read_only_kwds(kwds: Mapping[str, Any]) -> Mapping[str, Any]:
+    # copied so changing the dict that was passed in doesn't change the settings behind their back either
+    return MappingProxyType(dict(kwds))
 
-@define
+
+def _forget_built_logger(instance: "LoggerSettings", attribute, value):
+    # changing any setting invalidates the logger built from the old ones
+    if attribute.name != "_built_logger":
+        object.__setattr__(instance, "_built_logger", None)
+    return value
+
+
+@define(
+    slots=True,
+    weakref_slot=False,
+    on_setattr=[setters.convert, setters.validate, _forget_built_logger],
+)
 class LoggerSettings:
     """
     A data structure to hold settings for a logger.
@@ -367,14 +484,15 @@ class LoggerSettings:
         The directory to write log files to. This is only used if file is True or a string. Defaults to the current working directory.
 
     file : bool | Path | PathLike | str
-        If True, a structlog logger will be created to write json logs to a file named '{name}_{datetime.datetime.now().isoformat()}.log' in the specified log_dir.
+        If True, a structlog logger will be created to write json logs to a file named '{name}_{datetime.datetime.now().strftime(LOG_FILE_TIME_FORMAT)}.log' in the specified log_dir.
         If False, no file logger will be added.
         If it is a Path or PathLike object, the logger will write json logs to the specified file, ignoring the log_dir parameter.
         If it is a string, the logger will write json logs to a file named '{file}' in the specified log_dir.
 
-    handlers : list[logging.Handler] | None
-        A list of logging handlers to add to the logger. If None, no additional handlers will be added.
-        If not none, this will override the stream and file parameters.
+    handlers : tuple[logging.Handler, ...] | None
+        The logging handlers to add to the logger. If None, no additional handlers will be added.
+        If not none, this will override the stream and file parameters. Any iterable can be given, it is stored
+        as a tuple.
 
     override_logger : Any
         A logger object to wrap in structlog. If this is provided we ignore everything else and just wrap it in structlog.
@@ -382,8 +500,12 @@ class LoggerSettings:
     nowrap_overriden: bool
         If this is true then the overridden logger MUST be a structlog logger already
 
-    structlogkwds: dict[str, Any]
+    structlogkwds: Mapping[str, Any]
         A dictionary of keyword arguments to pass to structlog.wrap_logger when creating the logger. See the structlog documentation for more information.
+        Stored as a read only copy.
+
+    The logger built from the settings is reused by every run, and built again after any setting is reassigned.
+    `handlers` and `structlogkwds` are immutable, so reassigning is the only way to change a setting.
     """
 
     # might replace stdstructlogger function with a class that can be used to create loggers
@@ -391,19 +513,24 @@ class LoggerSettings:
     stream: bool | Any = field(default=True)
     log_dir: Path | PathLike = field(factory=Path.cwd)
     file: bool | Path | PathLike | str = field(default=True)
-    handlers: list[logging.Handler] | None = field(default=None)
+    handlers: tuple[logging.Handler, ...] | None = field(
+        default=None, converter=_handlers_tuple
+    )
     override_logger: Any = field(
         default=None
     )  # if this is provided we ignore everything except binds and just wrap this in structlog
     nowrap_overriden: bool = field(
         default=False
     )  # if this is true then the overridden logger MUST be a structlog logger already
-    structlogkwds: dict[str, Any] = field(
-        factory=dict
+    structlogkwds: Mapping[str, Any] = field(
+        factory=dict, converter=_read_only_kwds
     )  # keyword arguments to pass to structlog.wrap_logger
+    _built_logger: Any = field(
+        init=False, default=None, eq=False, repr=False
+    )  # the logger built from these settings, reused by every run until a setting changes
 
 
-@define
+@define(slots=True, weakref_slot=False, eq=False)
 class Pipeline:
     """
     A Pipeline is a collection of stages that are run in sequence. It is the primary
@@ -440,6 +567,7 @@ class Pipeline:
         *inputargs: StageInputs,
         inputs: StageInputs | None = None,
         output_mapper: Callable[[R], dict[str, Any]] | None = None,
+        jit: bool = False,
         name=None,
         **defaults: P.kwargs,
     ) -> Callable[[Callable[P, R]], Callable[P, R]] | Callable[P, R]:
@@ -451,13 +579,16 @@ class Pipeline:
         name_or_callable : str | Callable, optional
             the name of the stage or the function to register as a stage
 
-        inputs: list[Input], optional
+        inputs: Sequence[Input], optional
 
         output_mapper : Callable[[R], dict[str, Any]], optional
             a function that maps the return value of the stage to a dictionary
             of outputs. By default, this function returns a dictionary with a
             single key "return" that maps to the return value of the stage.
 
+        jit : bool, optional
+            compile the function with numba on its first run, see `Stage`, by default False
+
         defaults : dict
             default values for arguments to the stage, these will be wrapped in StageInputMapping compliant objects and
             joined with the `inputs` parameter.
@@ -471,44 +602,34 @@ class Pipeline:
         """
 
         stage_key = name or None
-        inputs = list(inputargs) + (inputs or [])
+        # inputargs is already a tuple, so the common no-inputs case doesn't build anything
+        inputs = (*inputargs, *inputs) if inputs else inputargs
+        # only pass output_mapper along if given so Stage keeps its own default
+        stagekwds = {} if output_mapper is None else {"output_mapper": output_mapper}
+        if jit:
+            stagekwds["jit"] = True
 
         def decorator(func: Callable[P, R]) -> Callable[P, R]:
-            nonlocal stage_key, inputs
-            if stage_key is None:
-                stage_key
-                stage_key = func.__name__
-
-            if output_mapper is None:
-                self.stages[stage_key] = Stage(function=func, inputs=inputs)
-            else:
-                self.stages[stage_key] = Stage(
-                    function=func, inputs=inputs, output_mapper=output_mapper
-                )
-
+            # interned so lookups of the key in the stage table can match on identity
+            key = func.__name__ if stage_key is None else sys.intern(stage_key)
+            self.stages[key] = Stage(function=func, inputs=inputs, **stagekwds)
             return func
 
-        match (stage_key is not None, name_or_callable):
-            case (_, noc) if callable(noc):
-                return decorator(name_or_callable)
-            case (False, noc) if isinstance(noc, str):
-                stage_key = noc
-                return decorator
-            case (True, noc) if isinstance(noc, str):
+        if callable(name_or_callable):
+            return decorator(name_or_callable)
+        if isinstance(name_or_callable, str):
+            if stage_key is not None:
                 raise ValueError(
                     "Cannot provide a name kwarg and a string as the first argument"
                 )
-            case (_, None):
-                return decorator
-
-        if isinstance(name_or_callable, str):
             stage_key = name_or_callable
             return decorator
-        elif name_or_callable is None:
+        if name_or_callable is None:
             return decorator
-        elif callable(name_or_callable):
-            stage_key = name_or_callable.__name__
-            return decorator(name_or_callable)
+        raise TypeError(
+            "Expected a stage name or a function as the first argument, got "
+            f"{type(name_or_callable).__name__} (pass inputs after the name)"
+        )
 
     def run_stage(self, stage_key: str, **kwargs: Any) -> Any:
         """
@@ -529,15 +650,30 @@ class Pipeline:
         -------
         the output of the stage
         """
-        context.STAGE.set((curr := self.stages[stage_key]))
+        if context.PIPELINE.get() is self:
+            # already inside the pipeline's context (e.g called from a stage), it can't be entered twice
+            return self._run_single_stage(stage_key, kwargs)
+        # run in the pipeline's context so setting the current stage doesn't leak into the caller's context
+        return self.ctx.run(self._run_single_stage, stage_key, kwargs)
+
+    def _run_single_stage(self, stage_key: str, kwargs: dict[str, Any]) -> Any:
+        return self._run_stage(
+            stage_key, self.stages[stage_key], context.LOG.get(), kwargs
+        )
+
+    def _run_stage(
+        self, stage_key: str, stage: Stage, log: Any, kwargs: dict[str, Any]
+    ) -> Any:
+        # `run` looks the logger up once and passes it to every stage instead of each stage looking it up
+        context.STAGE.set(stage)
         with logging_context(stage=stage_key):
             try:
-                output = curr.run(**kwargs)
+                output = stage.run(**kwargs)
             except ExitPipeline:
                 raise
             except Exception as e:
-                context.LOG.get().exception(e)
-                raise ExitPipeline("Error in pipeline", True, e) from e
+                log.exception(e)
+                raise ExitPipeline("Error in pipeline", error=True) from e
         # we dont reset the context stage so if we error we can see what stage we errored in
         return output
 
@@ -556,30 +692,158 @@ class Pipeline:
         -------
         a dictionary of the outputs of each stage
         """
-        self.ctx.run(self._init_run_logger)
+        return self.ctx.run(self._run, kwargs)
+
+    def _run(self, kwargs: dict[str, Any]) -> dict[str, Any]:
+        # runs inside the pipeline's context, entered once per run rather than once per stage
+        self._init_run_logger()
+        log = context.LOG.get()
         outputs = {}
-        for stage_key in self.stages:
+        for stage_key, stage in self.stages.items():
             try:
-                outputs[stage_key] = self.ctx.run(self.run_stage, stage_key, **kwargs)
+                outputs[stage_key] = self._run_stage(stage_key, stage, log, kwargs)
             except ExitPipeline as e:
-                log = self.ctx[context.LOG]
-                if e.error:
-                    log.exception(
-                        "Exited pipeline with error state.",
-                        exc_info=True,
-                    )
-                else:
-                    log.info("Exited pipeline successfully.")
+                self._log_exit(log, e)
         return outputs
 
+    @staticmethod
+    def _log_exit(log: Any, e: ExitPipeline) -> None:
+        if e.error:
+            log.exception(
+                "Exited pipeline with error state.",
+                exc_info=True,
+            )
+        else:
+            log.info("Exited pipeline successfully.")
+
+    def run_parallel(
+        self, max_workers: int | None = None, **kwargs: Any
+    ) -> dict[str, Any]:
+        """
+        Runs all the stages in the pipeline, stages that don't depend on each other run at the same time
+        in a thread pool. A stage depends on another if it takes one of its outputs (`pypedream.input.dependency`),
+        it is started as soon as every stage it depends on has finished, optional dependencies included.
+
+        Only dependencies that can be seen from a stage's inputs are known. A stage with an input that might read
+        `context.STAGES` some other way (a callback, a mapper other than `must_bind`, `KeyedInputMapper` or
+        `DependencyInputMapper`, immediate bindings included, or an input that isn't exactly an `InputBinding`)
+        waits for every stage added before it, as it would in `run`. A stage
+        function that reads `context.STAGES` or another stage's outputs itself can't be seen at all, it may run
+        before the stage it reads from, so add such stages with a `pypedream.input.dependency` input or use `run`.
+
+        Each stage runs in its own copy of the pipeline's context, so `context.STAGE` is the stage running in
+        that thread. Anything the stages share (e.g `Variables`) is shared between threads, so be careful
+        mutating it from stages that can run at the same time.
+
+        Parameters
+        ----------
+        max_workers : int | None, optional
+            the most stages to run at once, passed to `ThreadPoolExecutor`, by default its default
+
+        kwargs : dict
+            keyword arguments to pass to the stages, overrides any configured inputs
+            not validated so be careful
+
+        Returns
+        -------
+        a dictionary of the outputs of each stage, in the order the stages were added
+
+        Raises
+        ------
+        ValueError
+            if the stages depend on each other in a cycle, before any stage is run
+        """
+        return self.ctx.run(self._run_parallel, max_workers, kwargs)
+
+    def _schedule(self) -> tuple[dict[str, list[str]], dict[str, int]]:
+        # dependents of each stage and how many stages each one waits on, dependencies on stages that aren't
+        # in the pipeline are left for the stage to fail on like they would in `run`
+        stages = self.stages
+        dependents: dict[str, list[str]] = {stage_key: [] for stage_key in stages}
+        waiting: dict[str, int] = {}
+        table_sources = (context.STAGES, context.CTX)
+        earlier: list[str] = []
+        for stage_key, stage in stages.items():
+            dependencies = stage._dependencies(table_sources)
+            # can't tell what it reads from the stage table, keep the order `run` would have
+            dependencies = (
+                set(earlier) if dependencies is None else dependencies & stages.keys()
+            )
+            earlier.append(stage_key)
+            waiting[stage_key] = len(dependencies)
+            for dependency in dependencies:
+                dependents[dependency].append(stage_key)
+
+        # kahn's algorithm without running anything, whatever never becomes ready is on (or behind) a cycle
+        remaining = dict(waiting)
+        ready = [stage_key for stage_key, count in remaining.items() if not count]
+        while ready:
+            for dependent in dependents[ready.pop()]:
+                remaining[dependent] -= 1
+                if not remaining[dependent]:
+                    ready.append(dependent)
+        if blocked := [stage_key for stage_key, count in remaining.items() if count]:
+            raise ValueError(f"Stages {blocked} depend on each other in a cycle")
+        return dependents, waiting
+
+    def _run_parallel(
+        self, max_workers: int | None, kwargs: dict[str, Any]
+    ) -> dict[str, Any]:
+        dependents, waiting = self._schedule()
+        self._init_run_logger()
+        log = context.LOG.get()
+        stages = self.stages
+        outputs = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+
+            def submit(stage_key: str):
+                # copied from the pipeline's context, so each stage sets context.STAGE in its own copy
+                return pool.submit(
+                    contextvars.copy_context().run,
+                    self._run_stage,
+                    stage_key,
+                    stages[stage_key],
+                    log,
+                    kwargs,
+                )
+
+            running = {
+                submit(stage_key): stage_key
+                for stage_key, count in waiting.items()
+                if not count
+            }
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage_key = running.pop(future)
+                    try:
+                        outputs[stage_key] = future.result()
+                    except ExitPipeline as e:
+                        self._log_exit(log, e)
+                    # dependents run even if it failed, and fail on the missing output like they would in `run`
+                    for dependent in dependents[stage_key]:
+                        waiting[dependent] -= 1
+                        if not waiting[dependent]:
+                            running[submit(dependent)] = dependent
+        return {
+            stage_key: outputs[stage_key]
+            for stage_key in stages
+            if stage_key in outputs
+        }
+
     @ctx.default
     def _ctx(self):
         def _applydefaults():
             nonlocal self
-            context.PIPELINE.set(self)
-            context.VARIABLES.set(self.variables)
-            context.PARAMETERS.set(self.parameters)
-            context.STAGES.set(self.stages)
+            context.CTX.set(
+                evolve(
+                    context.CTX.get(),
+                    pipeline=self,
+                    variables=self.variables,
+                    parameters=self.parameters,
+                    stages=self.stages,
+                )
+            )
 
         ctx = contextvars.copy_context()
         ctx.run(_applydefaults)
@@ -589,21 +853,22 @@ class Pipeline:
         if self.log_settings is None:
             return
         ls = self.log_settings
-        match (ls.override_logger, ls.nowrap_overriden):
-            case (None, _):
-                context.LOG.set(
-                    stdstructlogger(
+        # built once per settings object, building again would open another file and attach duplicate handlers
+        if ls._built_logger is None:
+            match (ls.override_logger, ls.nowrap_overriden):
+                case (None, _):
+                    ls._built_logger = stdstructlogger(
                         ls.name.replace(" ", "_"),
                         stream=ls.stream,
                         log_dir=ls.log_dir,
                         file=ls.file,
                         handlers=ls.handlers,
                     )
-                )
 
-            case (override, nowrap):
-                context.LOG.set(
-                    override
-                    if nowrap
-                    else structlog.wrap_logger(override, **ls.structlogkwds)
-                )
+                case (override, nowrap):
+                    ls._built_logger = (
+                        override
+                        if nowrap
+                        else structlog.wrap_logger(override, **ls.structlogkwds)
+                    )
+        context.LOG.set(ls._built_logger)
@@ -2,11 +2,12 @@ from contextvars import ContextVar
 from warnings import warn
 from enum import Flag, auto
 from textwrap import dedent
+from types import MappingProxyType
+from weakref import ref
 from typing import (
     Any,
     Callable,
     Generic,
-    Literal,
     Mapping,
     ParamSpec,
     Sequence,
@@ -14,7 +15,7 @@ from typing import (
     TypeVar,
 )
 
-from attrs import define, field, frozen
+from attrs import define, field, frozen, setters
 
 from pypedream.core.logs import logging_context
 
@@ -23,7 +24,7 @@ R = TypeVar("R")
 T = TypeVar("T")
 
 StageKey: TypeAlias = str
-StageInputs: TypeAlias = list["Input"]
+StageInputs: TypeAlias = Sequence["Input"]
 StageOutputs: TypeAlias = dict[str, Any]
 StageTable: TypeAlias = dict[StageKey, "Stage"]
 
@@ -95,7 +96,7 @@ class OutputMapperBehaviour(Flag):
                 "Invalid behaviour value. Should be an OutputMapperBehaviour enum value or union of them"
             )
 
-        if not any(behaviour in value for behaviour in (STRICT, CHILL, PRESERVE)):
+        if not value.value & _MODE_BITS:
             raise ValueError(
                 "Invalid behaviour value. Should include STRICT, CHILL, or PRESERVE to determine how to handle unexpected outputs."
             )
@@ -103,6 +104,9 @@ class OutputMapperBehaviour(Flag):
 
 STRICT, CHILL, PRESERVE, WARN_UNEXPECTED = OutputMapperBehaviour
 
+# the behaviours that decide how unexpected outputs are handled, one of them has to be set
+_MODE_BITS = STRICT.value | CHILL.value | PRESERVE.value
+
 
 def DEFAULT_OUTPUT_MAPPER(output: Any) -> StageOutputs:
     """
@@ -150,6 +154,42 @@ class SequentialOutputMapper:
     behaviour: OutputMapperBehaviour = field(
         default=STRICT, validator=OutputMapperBehaviour._attrsvalidator
     )
+    # derived from the fields above once, the mapper is frozen so they never go stale (as long as keys isnt mutated)
+    _behaviours: tuple[OutputMapperBehaviour, ...] = field(
+        init=False, eq=False, repr=False
+    )
+    _keylen: int = field(init=False, eq=False, repr=False)
+    _handler: Callable[["SequentialOutputMapper", Sequence[Any]], StageOutputs] = field(
+        init=False, eq=False, repr=False
+    )
+    _warn: bool = field(init=False, eq=False, repr=False)
+
+    @_behaviours.default
+    def _behaviours_default(self) -> tuple[OutputMapperBehaviour, ...]:
+        return tuple(self.behaviour)
+
+    @_keylen.default
+    def _keylen_default(self) -> int:
+        return len(self.keys)
+
+    @_handler.default
+    def _handler_default(
+        self,
+    ) -> Callable[["SequentialOutputMapper", Sequence[Any]], StageOutputs]:
+        # the unbound function is stored, a bound method would be a reference cycle
+        match self._behaviours:
+            case [OutputMapperBehaviour.STRICT]:
+                return SequentialOutputMapper._handle_strict
+            case [OutputMapperBehaviour.CHILL, *_]:
+                return SequentialOutputMapper._handle_chill
+            case [OutputMapperBehaviour.PRESERVE, *_]:
+                return SequentialOutputMapper._handle_preserve
+            case _:  # pragma: no cover
+                return SequentialOutputMapper._handle_invalid
+
+    @_warn.default
+    def _warn_default(self) -> bool:
+        return OutputMapperBehaviour.WARN_UNEXPECTED in self._behaviours[1:]
 
     def _handle_unexpected(self, x: Sequence[Any]) -> StageOutputs:
         """
@@ -169,54 +209,44 @@ class SequentialOutputMapper:
         ValueError
             if self.behaviour is STRICT
         """
+        return self._handler(self, x)
 
-        seqlen = len(x)
-        keylen = len(self.keys)
-        longer = seqlen > keylen
+    def _handle_strict(self, x: Sequence[Any]) -> StageOutputs:
+        raise ValueError(
+            f"Length of x ({len(x)}) does not match length of keys ({self._keylen})"
+        )
 
-        behaviours = list(self.behaviour)
+    def _handle_chill(self, x: Sequence[Any]) -> StageOutputs:
+        seqlen = len(x)
+        keylen = self._keylen
+        # zip stops at the shorter of the two, no need to slice either
+        mapping = dict(zip(self.keys, x))
+        if self._warn:
+            # TODO: log a warning, with more info
+            warn(
+                f"Length of outputs received did not match expected. want: {keylen}, have: {seqlen}"
+            )
+        return mapping
 
-        match behaviours:
-            case [OutputMapperBehaviour.STRICT]:
-                raise ValueError(
-                    f"Length of x ({len(x)}) does not match length of keys ({len(self.keys)})"
-                )
-
-            case [OutputMapperBehaviour.CHILL, *etc]:
-                mapping = (
-                    {k: v for k, v in zip(self.keys, x[0:keylen])}
-                    if longer
-                    else {k: v for k, v in zip(self.keys[0:seqlen], x)}
-                )
-                if OutputMapperBehaviour.WARN_UNEXPECTED in etc:
-                    # TODO: log a warning, with more info
-                    warn(
-                        f"Length of outputs received did not match expected. want: {keylen}, have: {seqlen}"
-                    )
-
-                return mapping
-
-            case [OutputMapperBehaviour.PRESERVE, *etc]:
-                mapping = (
-                    {k: v for k, v in zip(self.keys, x[0:keylen])}
-                    if longer
-                    else {k: v for k, v in zip(self.keys[0:seqlen], x)}
-                )
-                if longer:
-                    extra = x[keylen:]
-                    mapping.update({self.EXTRA_MAPPING_KEY: extra})
-
-                if OutputMapperBehaviour.WARN_UNEXPECTED in etc:
-                    # TODO: log a warning, with more info
-                    warn(
-                        f"Length of outputs received did not match expected. want: {keylen}, have: {seqlen}"
-                    )
-                return mapping
+    def _handle_preserve(self, x: Sequence[Any]) -> StageOutputs:
+        seqlen = len(x)
+        keylen = self._keylen
+        mapping = dict(zip(self.keys, x))
+        if seqlen > keylen:
+            # sliced rather than islice'd so extras keep the type of x
+            mapping[self.EXTRA_MAPPING_KEY] = x[keylen:]
+
+        if self._warn:
+            # TODO: log a warning, with more info
+            warn(
+                f"Length of outputs received did not match expected. want: {keylen}, have: {seqlen}"
+            )
+        return mapping
 
-            case _:  # pragma: no cover
-                raise ValueError(
-                    "Invalid behaviour value. Should include STRICT, CHILL, or PRESERVE to determine how to handle unexpected outputs."
-                )
+    def _handle_invalid(self, x: Sequence[Any]) -> StageOutputs:  # pragma: no cover
+        raise ValueError(
+            "Invalid behaviour value. Should include STRICT, CHILL, or PRESERVE to determine how to handle unexpected outputs."
+        )
 
     def __call__(self, x: Sequence[Any]) -> StageOutputs:
         """
@@ -237,9 +267,9 @@ class SequentialOutputMapper:
             if the length of x does not match the length of `self.keys` and `self.strict` is True
         """
         return (
-            {k: v for k, v in zip(self.keys, x)}
-            if len(x) == len(self.keys)
-            else self._handle_unexpected(x)
+            dict(zip(self.keys, x))
+            if len(x) == self._keylen
+            else self._handler(self, x)
         )
 
     def __repr__(self) -> str:  # pragma: no cover
@@ -276,8 +306,50 @@ class KeyedOutputMapper:
     behaviour: OutputMapperBehaviour = field(
         default=STRICT, validator=OutputMapperBehaviour._attrsvalidator
     )
+    # derived from the fields above once, the mapper is frozen so they never go stale (as long as keys isnt mutated)
+    _behaviours: tuple[OutputMapperBehaviour, ...] = field(
+        init=False, eq=False, repr=False
+    )
+    _keylen: int = field(init=False, eq=False, repr=False)
+    _items: tuple[tuple[str, str], ...] = field(init=False, eq=False, repr=False)
+    _handler: Callable[["KeyedOutputMapper", Mapping[str, Any]], StageOutputs] = field(
+        init=False, eq=False, repr=False
+    )
+    _warn: bool = field(init=False, eq=False, repr=False)
+
+    @_behaviours.default
+    def _behaviours_default(self) -> tuple[OutputMapperBehaviour, ...]:
+        return tuple(self.behaviour)
+
+    @_keylen.default
+    def _keylen_default(self) -> int:
+        return len(self.keys)
+
+    @_items.default
+    def _items_default(self) -> tuple[tuple[str, str], ...]:
+        # iterating a tuple is cheaper than walking the dict's items view every call
+        return tuple(self.keys.items())
+
+    @_handler.default
+    def _handler_default(
+        self,
+    ) -> Callable[["KeyedOutputMapper", Mapping[str, Any]], StageOutputs]:
+        # the unbound function is stored, a bound method would be a reference cycle
+        match self._behaviours:
+            case [OutputMapperBehaviour.STRICT]:
+                return KeyedOutputMapper._handle_strict
+            case [OutputMapperBehaviour.CHILL, *_]:
+                return KeyedOutputMapper._handle_chill
+            case [OutputMapperBehaviour.PRESERVE, *_]:
+                return KeyedOutputMapper._handle_preserve
+            case _:  # pragma: no cover
+                return KeyedOutputMapper._handle_invalid
 
-    def _handle_unexpected(self, x: dict[str, Any]) -> StageOutputs:
+    @_warn.default
+    def _warn_default(self) -> bool:
+        return OutputMapperBehaviour.WARN_UNEXPECTED in self._behaviours[1:]
+
+    def _handle_unexpected(self, x: Mapping[str, Any]) -> StageOutputs:
         """
         Handle unexpected outputs based on the behaviour.
 
@@ -295,37 +367,35 @@ class KeyedOutputMapper:
         ValueError
             if self.behaviour is STRICT
         """
+        return self._handler(self, x)
 
-        behaviours = list(self.behaviour)
+    def _handle_strict(self, x: Mapping[str, Any]) -> StageOutputs:
+        raise ValueError(
+            f"Keys in x ({x.keys()}) do not match keys in self.keys ({self.keys.keys()})"
+        )
 
-        match behaviours:
-            case [OutputMapperBehaviour.STRICT]:
-                raise ValueError(
-                    f"Keys in x ({x.keys()}) do not match keys in self.keys ({self.keys.keys()})"
-                )
-
-            case [OutputMapperBehaviour.CHILL, *etc]:
-                mapping = {self.keys[k]: x[k] for k in self.keys if k in x}
-                if WARN_UNEXPECTED in etc:
-                    warn(
-                        f"Keys of outputs received did not match expected. want: {set(self.keys.keys())}, have: {set(x.keys())}"
-                    )
-                return mapping
-
-            case [OutputMapperBehaviour.PRESERVE, *etc]:
-                mapping = {self.keys[k]: x[k] for k in self.keys if k in x}
-                extra = {k: v for k, v in x.items() if k not in self.keys}
-                mapping.update(extra)
-                if WARN_UNEXPECTED in etc:
-                    warn(
-                        f"Keys of outputs received did not match expected. want: {set(self.keys.keys())}, have: {set(x.keys())}"
-                    )
-                return mapping
+    def _handle_chill(self, x: Mapping[str, Any]) -> StageOutputs:
+        mapping = {out: x[k] for k, out in self._items if k in x}
+        if self._warn:
+            warn(
+                f"Keys of outputs received did not match expected. want: {set(self.keys.keys())}, have: {set(x.keys())}"
+            )
+        return mapping
+
+    def _handle_preserve(self, x: Mapping[str, Any]) -> StageOutputs:
+        mapping = {out: x[k] for k, out in self._items if k in x}
+        extra = {k: v for k, v in x.items() if k not in self.keys}
+        mapping.update(extra)
+        if self._warn:
+            warn(
+                f"Keys of outputs received did not match expected. want: {set(self.keys.keys())}, have: {set(x.keys())}"
+            )
+        return mapping
 
-            case _:  # pragma: no cover
-                raise ValueError(
-                    "Invalid behaviour value. Should include STRICT, CHILL, or PRESERVE to determine how to handle unexpected outputs."
-                )
+    def _handle_invalid(self, x: Mapping[str, Any]) -> StageOutputs:  # pragma: no cover
+        raise ValueError(
+            "Invalid behaviour value. Should include STRICT, CHILL, or PRESERVE to determine how to handle unexpected outputs."
+        )
 
     def __call__(self, x: Mapping[str, Any]) -> StageOutputs:
         """
@@ -345,13 +415,14 @@ class KeyedOutputMapper:
         ValueError
             if a key in x is not in `self.keys`
         """
-        all_expected = set(self.keys.keys()) == set(x.keys())
-
-        return (
-            {self.keys[k]: x[k] for k in self.keys}
-            if all_expected
-            else self._handle_unexpected(x)
-        )
+        # with as many keys as expected, x has exactly the expected keys iff none of them is missing,
+        # so the happy path just tries the lookups instead of comparing key sets first
+        if len(x) == self._keylen:
+            try:
+                return {out: x[k] for k, out in self._items}
+            except KeyError:
+                pass
+        return self._handler(self, x)
 
     def __repr__(self) -> str:  # pragma: no cover
         return f"MappingOutputMapper(keys={self.keys})"
@@ -367,14 +438,52 @@ class KeyedOutputMapper:
 INPUT_NOT_FOUND = "INPUT NOT FOUND"
 
 
-UNBOUND = "UNBOUND"
-UNBOUND_T = Literal["UNBOUND"]
+class _UnboundType:
+    """
+    Type of the `UNBOUND` sentinel, there is only ever one instance so it is always compared with `is`.
+    """
+
+    __slots__ = ()
+    _instance: "_UnboundType | None" = None
+
+    def __new__(cls) -> "_UnboundType":
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __repr__(self) -> str:
+        return "UNBOUND"
+
+    def __reduce__(self) -> str:
+        # pickled by name so unpickling gives back the same instance
+        return "UNBOUND"
+
+
+UNBOUND = _UnboundType()
+UNBOUND_T: TypeAlias = _UnboundType
+
+
+# bumped whenever an Input or InputBinding is changed in place. they can be shared between stages and don't know
+# which stages use them, so every stage checks its input plan against this before using it (see Stage._prepare_inputs)
+_input_generation = 0
+
+
+def _bump_input_generation(instance, attribute, value):
+    global _input_generation
+    _input_generation += 1
+    return value
 
 
 # ------------------------------
 # INPUT TYPE
 # ------------------------------
-@define
+@define(
+    slots=True,
+    eq=False,
+    order=False,
+    weakref_slot=False,
+    on_setattr=[setters.convert, setters.validate, _bump_input_generation],
+)
 class Input(Generic[T, R]):
     """
     The Input class is a generic class that represents an input to a stage.
@@ -418,7 +527,7 @@ def must_bind(x: T | UNBOUND_T) -> T:
     """
     A function that raises a ValueError if the input is unbound. Used as a default mapper for bindings.
     """
-    if x == UNBOUND:
+    if x is UNBOUND:
         raise ValueError("Unbound input")
     return x
 
@@ -431,13 +540,17 @@ BindingMapperType = (
 )
 
 
-def _unwrap_ctxvar_then_apply(
-    mapper: Callable[[T | UNBOUND_T], R] | Callable[[T], R],
-) -> Callable[[ContextVar[T]], R]:
-    def wrapper(var: ContextVar[T]) -> R:
-        return mapper(var.get())
+@frozen
+class _UnwrapCtxvarThenApply(Generic[T, R]):
+    """
+    applies `mapper` to `var.get()`. a class rather than a closure so a stage can recognise it and call `.get()`
+    once for every input deferred to the same variable (see `_plan_inputs`).
+    """
 
-    return wrapper
+    mapper: Callable[[T | UNBOUND_T], R] | Callable[[T], R]
+
+    def __call__(self, var: ContextVar[T]) -> R:
+        return self.mapper(var.get())
 
 
 def _call_first_then_apply(
@@ -468,7 +581,12 @@ def _call_first_then_apply(
     return wrapper
 
 
-@define
+@define(
+    slots=True,
+    eq=False,
+    order=False,
+    on_setattr=[setters.convert, setters.validate, _bump_input_generation],
+)
 class InputBinding(Generic[T, R]):
     """
     An `InputBinding[T, R]` is used as part of an `Input` to a `Stage`.
@@ -491,7 +609,7 @@ class InputBinding(Generic[T, R]):
         The `source` of the input, this may be the value itself (i.e T == R) or a value
         from which the input can be retrieved. How it is retrieved from the source is handled
         by the `mapper`. An uninitialized InputBinding or one that is evaluated at execution
-        time via a `ContextVar` will have `source == UNBOUND`.
+        time via a `ContextVar` will have `source is UNBOUND`.
 
     mapper : BindingMapperType, optional
         The function called when the `InputBinding` is evaluated. The `mapper` is responsible
@@ -530,11 +648,12 @@ class InputBinding(Generic[T, R]):
         # we never force an unbound input to raise an exception, the mapper decides what to do
         # however it is the default behaviour.
         try:
-            match (self.source is not UNBOUND, self.defer is not None):
-                case (True, _) | (_, False):
-                    return self.mapper(self.source)
-                case _:
-                    return self.mapper(self.defer)
+            if self.source is UNBOUND and self.defer is not None:
+                return self.mapper(self.defer)
+            return self.mapper(self.source)
+        except UnboundInputException:
+            # already says which binding failed (e.g a mapper that evaluates another binding), don't wrap it again
+            raise
         except Exception as e:
             raise UnboundInputException(self) from e
 
@@ -597,7 +716,7 @@ class InputBinding(Generic[T, R]):
         """
 
         return cls(
-            mapper=mapper if not get_first else _unwrap_ctxvar_then_apply(mapper),
+            mapper=mapper if not get_first else _UnwrapCtxvarThenApply(mapper),
             defer=source,
         )
 
@@ -675,22 +794,54 @@ class InputBinding(Generic[T, R]):
 
 class UnboundInputException(Exception):
     """
-    Exception raised from InputBinding if an exception is raised in the mapper.
+    Exception raised from InputBinding if an exception is raised in the mapper, the original exception is its
+    `__cause__`. If the mapper itself raises an `UnboundInputException` (it evaluated another binding) that one is
+    propagated as is rather than wrapped again.
     """
 
     _TMPLT_MSG = "Failure to bind InputBinding with source={source}, mapper={mapper}, defer={defer}"
+    _GONE_MSG = "Failure to bind InputBinding (the binding no longer exists)"
 
     def __init__(self, binding: "InputBinding", *args):
-        self.binding = binding
+        # only a weak reference, a caught exception kept around (e.g collected errors) shouldn't keep the
+        # binding's source alive, which may be large. a binding that can't be weakly referenced (e.g a slotted
+        # subclass without __weakref__) is held strongly rather than hiding the real failure behind a TypeError
+        try:
+            self._binding = ref(binding)
+        except TypeError:
+            self._binding = lambda: binding
+        self._message = None
         super().__init__(*args)
 
-    def __str__(self) -> str:  # pragma: no cover
-        source, mapper, defer = (
-            self.binding.source,
-            self.binding.mapper,
-            self.binding.defer,
+    @property
+    def binding(self) -> "InputBinding | None":
+        """
+        the binding that failed, `None` if it has since been garbage collected or the exception was unpickled
+        """
+        return self._binding() if self._binding is not None else None
+
+    def __str__(self) -> str:
+        if self._message is not None:
+            return self._message
+        if (binding := self.binding) is None:
+            return self._GONE_MSG
+        return self._TMPLT_MSG.format(
+            source=binding.source, mapper=binding.mapper, defer=binding.defer
         )
-        return self._TMPLT_MSG.format(source=source, mapper=mapper, defer=defer)
+
+    def __reduce__(self):
+        # the binding often won't pickle (mappers are closures and lambdas), so the message is sent instead
+        return _unpickle_unbound_input_exception, (str(self), self.args)
+
+
+def _unpickle_unbound_input_exception(
+    message: str, args: tuple
+) -> UnboundInputException:
+    e = UnboundInputException.__new__(UnboundInputException, *args)
+    Exception.__init__(e, *args)
+    e._binding = None
+    e._message = message
+    return e
 
 
 class UndefinedInputException(Exception):
@@ -707,7 +858,7 @@ class UndefinedInputException(Exception):
 # define inputs and their bindings.
 
 
-@define
+@define(slots=True, eq=False, order=False, weakref_slot=False)
 class DependencyInputMapper(Generic[T, R]):
     from_stage: StageKey = field()
     from_output: str = field(default=DEFAULT_OUTPUT_KEY)
@@ -715,56 +866,68 @@ class DependencyInputMapper(Generic[T, R]):
     required: bool = field(default=True)
 
     def __call__(self, source: StageTable | UNBOUND_T) -> T:
-        if (source is UNBOUND) and self.required:
+        # required is a plain field that can be reassigned, so this is decided per call rather than cached
+        if self.required:
+            return self._call_required(source)
+        return self._call_optional(source)
+
+    def _call_required(self, source: StageTable | UNBOUND_T) -> T:
+        if source is UNBOUND:
             raise UndefinedInputException(
                 "Source stage table is undefined... how could I get a stage output?"
             )
-        elif source is UNBOUND:
-            return self.default
-        elif ((stage := source.get(self.from_stage, None)) is None) and self.required:
+        if (stage := source.get(self.from_stage, None)) is None:
             raise UndefinedInputException(
                 f"Stage {self.from_stage} not found in source, hence output {self.from_output} not found."
             )
-        elif not stage:
+        if not stage.has_run:
+            raise UndefinedInputException(
+                f"Stage {self.from_stage} has not run yet. Cannot get output {self.from_output}."
+            )
+        try:
+            return stage.outputs[self.from_output]
+        except KeyError:
+            raise UndefinedInputException(
+                f"Stage {self.from_stage} completed and did not produce output {self.from_output}."
+            ) from None
+
+    def _call_optional(self, source: StageTable | UNBOUND_T) -> T:
+        if source is UNBOUND:
             return self.default
-        else:
-            match (stage.has_run, self.from_output in stage.outputs, self.required):
-                case (False, _, True):
-                    raise UndefinedInputException(
-                        f"Stage {self.from_stage} has not run yet. Cannot get output {self.from_output}."
-                    )
-                case (True, False, True):
-                    raise UndefinedInputException(
-                        f"Stage {self.from_stage} completed and did not produce output {self.from_output}."
-                    )
-                case (True, _, _):
-                    return stage.outputs.get(self.from_output, self.default)
-                case _:  # pragma: no cover
-                    raise Exception("what the f")
-
-
-@define
+        stage = source.get(self.from_stage, None)
+        if stage is None or not stage.has_run:
+            return self.default
+        return stage.outputs.get(self.from_output, self.default)
+
+
+@define(slots=True, eq=False, order=False, weakref_slot=False)
 class KeyedInputMapper(Generic[T, R]):
     from_key: str = field()
     default: T = field(default=INPUT_NOT_FOUND)
     required: bool = field(default=True)
 
     def __call__(self, source: Mapping[str, Any] | UNBOUND_T) -> T:
-        match (source is UNBOUND, self.required):
-            case (True, True):
-                raise UndefinedInputException(
-                    "Source mapping is undefined... how could I get a keyed input?"
-                )
-            case (True, False):
-                return self.default
-            case (False, True):
-                if self.from_key not in source:
-                    raise UndefinedInputException(
-                        f"Key {self.from_key} not found in source."
-                    )
-                return source[self.from_key]
-            case (False, False):
-                return source.get(self.from_key, self.default)
+        # same as DependencyInputMapper, required can be reassigned so it is checked per call
+        if self.required:
+            return self._call_required(source)
+        return self._call_optional(source)
+
+    def _call_required(self, source: Mapping[str, Any] | UNBOUND_T) -> T:
+        if source is UNBOUND:
+            raise UndefinedInputException(
+                "Source mapping is undefined... how could I get a keyed input?"
+            )
+        try:
+            return source[self.from_key]
+        except KeyError:
+            raise UndefinedInputException(
+                f"Key {self.from_key} not found in source."
+            ) from None
+
+    def _call_optional(self, source: Mapping[str, Any] | UNBOUND_T) -> T:
+        if source is UNBOUND:
+            return self.default
+        return source.get(self.from_key, self.default)
 
 
 def _prepare_inputs_and_context(
@@ -786,15 +949,134 @@ def _prepare_inputs_and_context(
     prepared_inputs = {}
     logged_inputs = {}
     for input_mapping in inputs:
-        inputdict, logged = input_mapping.get(), input_mapping.logged
-        prepared_inputs.update(inputdict)
-        if logged:
-            logged_inputs.update(inputdict)
+        # same as input_mapping.get() without building a one item dict per input
+        as_arg, value = input_mapping.as_arg, input_mapping.bind()
+        prepared_inputs[as_arg] = value
+        if input_mapping.logged:
+            logged_inputs[as_arg] = value
 
     return prepared_inputs, logged_inputs
 
 
-@define
+# what Stage.__repr__ / __str__ used to build with dedent on every call
+_STAGE_TEMPLATE = dedent(
+    """\
+    Stage(
+        function={function},
+        inputs={inputs},
+        outputs={outputs},
+        output_mapper={output_mapper},
+        has_run={has_run},
+    )"""
+)
+
+
+# (static inputs, static logged inputs, (deferred as_args, deferred logged flags, deferred bindings),
+#  ((variable, as_args, logged flags, mappers, bindings) for each variable contextual inputs defer to))
+_InputPlan: TypeAlias = tuple[
+    dict[str, Any],
+    dict[str, Any],
+    tuple[tuple[str, ...], tuple[bool, ...], tuple[Callable[[], Any], ...]],
+    tuple[
+        tuple[
+            ContextVar[Any],
+            tuple[str, ...],
+            tuple[bool, ...],
+            tuple[Callable[[Any], Any], ...],
+            tuple["InputBinding", ...],
+        ],
+        ...,
+    ],
+]
+
+
+def _plan_inputs(inputs: StageInputs) -> _InputPlan:
+    """
+    Split the inputs of a stage into the ones bound to a value known up front (`InputBinding.immediate` with the
+    default `must_bind` mapper), which are resolved once here, and the rest, which are kept as parallel tuples to be resolved every time the stage runs.
+    The deferred inputs are applied over the static ones, an earlier deferred input that a later static one
+    overrides is dropped so later inputs still win.
+
+    Inputs made with `InputBinding.contextual` (e.g every `from_stage` dependency) are grouped by the variable they
+    defer to, so it is read once per run for all of them rather than once per input. The mappers stored for them are
+    the binding's own mapper objects, so changes to their fields are seen on the next run, and the plan is rebuilt
+    when a binding itself is changed.
+    """
+    static, static_logged = {}, {}
+    deferred: dict[str, tuple[bool, Callable[[], Any]]] = {}
+    contextual: dict[str, tuple[bool, "InputBinding"]] = {}
+    for input_mapping in inputs:
+        as_arg, logged, bind = (
+            input_mapping.as_arg,
+            input_mapping.logged,
+            input_mapping.bind,
+        )
+        deferred.pop(as_arg, None)
+        contextual.pop(as_arg, None)
+        if type(bind) is not InputBinding:
+            # anything else, subclasses included (they may override __call__), is called as is on every run
+            deferred[as_arg] = (logged, bind)
+        elif bind.defer is None and bind.mapper is must_bind:
+            # must_bind hands back the source itself, so every run would get the same object anyway.
+            # any other mapper may copy or be impure, it keeps being called on every run
+            static[as_arg] = value = bind()
+            if logged:
+                static_logged[as_arg] = value
+        elif bind.source is UNBOUND and isinstance(bind.mapper, _UnwrapCtxvarThenApply):
+            contextual[as_arg] = (logged, bind)
+        else:
+            deferred[as_arg] = (logged, bind)
+
+    # keyed by id, whatever is deferred to only has to have a .get(), not be hashable
+    groups: dict[int, tuple[Any, list, list, list, list]] = {}
+    for as_arg, (logged, bind) in contextual.items():
+        _, args, logflags, mappers, binds = groups.setdefault(
+            id(bind.defer), (bind.defer, [], [], [], [])
+        )
+        args.append(as_arg)
+        logflags.append(logged)
+        mappers.append(bind.mapper.mapper)
+        binds.append(bind)
+
+    deferred_logged = tuple(logged for logged, _ in deferred.values())
+    deferred_binds = tuple(bind for _, bind in deferred.values())
+    return (
+        static,
+        static_logged,
+        (tuple(deferred), deferred_logged, deferred_binds),
+        tuple((var, *map(tuple, group)) for var, *group in groups.values()),
+    )
+
+
+# what a stage that hasn't run has as outputs, shared by every such stage so it is read only.
+# run always replaces outputs rather than filling it in so this is never written to
+_NO_OUTPUTS: Mapping[str, Any] = MappingProxyType({})
+
+
+def _forget_input_plan(instance: "Stage", attribute, value):
+    # new inputs, plan them again on the next run
+    instance._input_plan = None
+    return value
+
+
+def _forget_compiled(instance: "Stage", attribute, value):
+    # a different function, or jit turned on or off, compile again on the next run if needed
+    instance._compiled = None
+    return value
+
+
+def _njit(function: Callable[P, R]) -> Callable[P, R]:
+    # numba is optional and heavy, only imported by the first run of a stage with jit=True
+    try:
+        import numba
+    except ImportError:
+        raise ImportError(
+            "Stage(jit=True) requires numba, install it with `pip install numba`"
+        ) from None
+    return numba.njit(function)
+
+
+@define(slots=True, eq=False, order=False, weakref_slot=False)
 class Stage(Generic[P, R]):
     """
     A Stage is a wrapper around a function that is used in a Pipeline. It is currently tightly coupled to the Pipeline object.
@@ -808,25 +1090,79 @@ class Stage(Generic[P, R]):
     has_run : bool
         a flag indicating whether the stage has been run in the context of a pipeline
 
-    inputs : StageInputs
-        a list of objects conforming to the StageInputMapping protocol
+    inputs : tuple[Input, ...]
+        objects conforming to the StageInputMapping protocol
         that define what and how to pass arguments to the stage in the
-        context of a pipeline
+        context of a pipeline. Any sequence can be passed, it is stored as a tuple so it can't be changed
+        in place. Inputs bound with `InputBinding.immediate` and the default mapper are resolved on the
+        first run and reused until the stage is reset, `inputs` is reassigned, or any `Input` or
+        `InputBinding` is changed.
 
-    outputs : StageOutputs
-        a dictionary mapping keys to the results of the stage
+    outputs : Mapping[str, Any]
+        a dictionary mapping keys to the results of the stage. Until the stage runs it is an empty read only
+        mapping shared by every stage that hasn't run, so don't write to it
 
     output_mapper : Callable[[R], StageOutputs]
         a function that maps the return value of the stage to a dictionary
         of outputs. By default, this function returns a dictionary with a
         single key "return" that maps to the return value of the stage.
+
+    jit : bool
+        compile `function` with `numba.njit` on the first run and call the compiled function from then on.
+        Only for functions numba can compile in nopython mode (numeric code on numbers and numpy arrays),
+        requires numba to be installed, by default False
     """
 
-    function: Callable[P, R]
-    inputs: StageInputs = field(factory=list)
+    function: Callable[P, R] = field(on_setattr=_forget_compiled)
+    inputs: tuple["Input", ...] = field(
+        default=(),
+        converter=tuple,
+        on_setattr=setters.pipe(setters.convert, _forget_input_plan),
+    )
     has_run: bool = field(default=False)
-    outputs: StageOutputs = field(factory=dict)
+    outputs: Mapping[str, Any] = field(default=_NO_OUTPUTS)
     output_mapper: Callable[[R], StageOutputs] = field(default=DEFAULT_OUTPUT_MAPPER)
+    jit: bool = field(default=False, on_setattr=_forget_compiled)
+    # function compiled with numba on the first run when jit is set
+    _compiled: Callable[P, R] | None = field(
+        init=False, default=None, eq=False, repr=False
+    )
+    # inputs split into static and deferred on the first run, cleared by reset and when inputs is reassigned
+    _input_plan: _InputPlan | None = field(
+        init=False, default=None, eq=False, repr=False
+    )
+    # the _input_generation the plan was built at, any Input or InputBinding changed since makes it stale
+    _planned_at: int = field(init=False, default=-1, eq=False, repr=False)
+
+    def _prepare_inputs(self) -> tuple[dict[str, Any], dict[str, Any]]:
+        plan = self._input_plan
+        if plan is None or self._planned_at != _input_generation:
+            self._planned_at = _input_generation
+            plan = self._input_plan = _plan_inputs(self.inputs)
+
+        static, static_logged, (args, logflags, binds), contextual = plan
+        prepared_inputs = static.copy()
+        logged_inputs = static_logged.copy()
+        for as_arg, logged, bind in zip(args, logflags, binds):
+            prepared_inputs[as_arg] = value = bind()
+            if logged:
+                logged_inputs[as_arg] = value
+
+        for var, args, logflags, mappers, binds in contextual:
+            try:
+                source = var.get()
+            except Exception as e:
+                raise UnboundInputException(binds[0]) from e
+            for as_arg, logged, mapper, bind in zip(args, logflags, mappers, binds):
+                try:
+                    prepared_inputs[as_arg] = value = mapper(source)
+                except UnboundInputException:
+                    raise
+                except Exception as e:
+                    raise UnboundInputException(bind) from e
+                if logged:
+                    logged_inputs[as_arg] = value
+        return prepared_inputs, logged_inputs
 
     def run(self, **kwargs) -> R:
         """
@@ -846,44 +1182,98 @@ class Stage(Generic[P, R]):
             be careful if this is something mutable.
 
         """
-        inputs, logctx = _prepare_inputs_and_context(self.inputs)
-        inputs.update(kwargs)
-        with logging_context(**logctx):
-            output = self.function(**inputs)
-
-        self.outputs = self.output_mapper(output)
+        inputs, logctx = self._prepare_inputs()
+        if kwargs:
+            inputs.update(kwargs)
+        function = self.function
+        if self.jit:
+            if self._compiled is None:
+                self._compiled = _njit(function)
+            function = self._compiled
+        # most stages log no inputs, don't set up and tear down an empty structlog context for them
+        if logctx:
+            with logging_context(**logctx):
+                output = function(**inputs)
+        else:
+            output = function(**inputs)
+
+        # the default mapper is inlined, output_mapper can be reassigned so this is checked per run
+        mapper = self.output_mapper
+        self.outputs = (
+            {DEFAULT_OUTPUT_KEY: output}
+            if mapper is DEFAULT_OUTPUT_MAPPER
+            else mapper(output)
+        )
         self.has_run = True
         return output
 
+    def _dependencies(
+        self, table_sources: tuple[Any, ...] = ()
+    ) -> set[StageKey] | None:
+        """
+        the keys of the stages this stage takes outputs from, i.e the `from_stage` of every input whose binding
+        maps with a `DependencyInputMapper` (directly or via `InputBinding.contextual`, as `pypedream.input.dependency` does)
+
+        Parameters
+        ----------
+        table_sources : tuple[Any, ...], optional
+            the variables a binding can read the stage table from (e.g `context.STAGES`), a binding deferred to one
+            of them with any other mapper can read any stage
+
+        Returns
+        -------
+        set[StageKey] | None
+            `None` if an input might read the stage table in a way that can't be inspected: a mapper other than
+            `must_bind`, a `KeyedInputMapper` or a `DependencyInputMapper` (immediate bindings included), a binding
+            deferred to one of `table_sources` without a `DependencyInputMapper`, a callback, or anything that isn't
+            exactly an `InputBinding` (its `__call__` could do anything)
+        """
+        dependencies = set()
+        for input_mapping in self.inputs:
+            bind = input_mapping.bind
+            if type(bind) is not InputBinding:
+                return None
+            mapper = bind.mapper
+            if isinstance(mapper, _UnwrapCtxvarThenApply):
+                mapper = mapper.mapper
+            if type(mapper) is DependencyInputMapper:
+                dependencies.add(mapper.from_stage)
+                continue
+            if mapper is not must_bind and type(mapper) is not KeyedInputMapper:
+                # any other mapper could read the stage table itself
+                return None
+            defer = bind.defer
+            if defer is None:
+                continue
+            reads_table = any(defer is source for source in table_sources)
+            if reads_table or not hasattr(defer, "get"):
+                # reads the stage table some other way, or a callback that might
+                return None
+        return dependencies
+
     def reset(self) -> None:
         """
         resets all internal state except for defaults
         """
         self.has_run = False
-        self.outputs = {}
+        self.outputs = _NO_OUTPUTS
+        self._input_plan = None
 
     def __repr__(self) -> str:  # pragma: no cover
-        repr = dedent(
-            f"""\
-            Stage(
-                function={self.function.__repr__()},
-                inputs={self.inputs.__repr__()},
-                outputs={self.outputs.__repr__()},
-                output_mapper={self.output_mapper.__repr__()},
-                has_run={self.has_run.__repr__()},
-            )"""
+        return _STAGE_TEMPLATE.format(
+            function=repr(self.function),
+            inputs=repr(self.inputs),
+            outputs=repr(self.outputs),
+            output_mapper=repr(self.output_mapper),
+            has_run=repr(self.has_run),
         )
-        return repr
 
     def __str__(self) -> str:  # pragma: no cover
         # TODO make this nicer
-        return dedent(
-            f"""\
-            Stage(
-                function={self.function.__str__()},
-                inputs={self.inputs.__str__()},
-                outputs={self.outputs.__str__()},
-                output_mapper={self.output_mapper.__str__()},
-                has_run={self.has_run.__str__()},
-            )"""
+        return _STAGE_TEMPLATE.format(
+            function=str(self.function),
+            inputs=str(self.inputs),
+            outputs=str(self.outputs),
+            output_mapper=str(self.output_mapper),
+            has_run=str(self.has_run),
         )
@@ -4,7 +4,16 @@ directly.
 """
 from typing import TypedDict
 
-from pypedream.core.context import LOG, PARAMETERS, PIPELINE, STAGE, STAGES, VARIABLES
+from pypedream.core.context import (
+    CTX,
+    LOG,
+    PARAMETERS,
+    PIPELINE,
+    STAGE,
+    STAGES,
+    VARIABLES,
+    update_ctx,
+)
 from pypedream.core.logs import StdBoundLogger
 from pypedream.core.pipelines import Parameters, Pipeline, Variables
 from pypedream.core.stages import Stage, StageTable
@@ -63,6 +72,8 @@ __all__ = [
     "logger",
     "pipeline_context",
     "PipelineContext",
+    "CTX",
+    "update_ctx",
     "PARAMETERS",
     "PIPELINE",
     "STAGE",
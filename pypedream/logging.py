@@ -5,65 +5,100 @@ these wrappers all get the logger from the context, which is a lookup from a con
 
 this is a good idea, but it's not always the best idea. if you're logging in a hot loop, you don't want to be doing a
 context lookup every time you log. i mean, this is a library for building pipelines, so it's not like your bottleneck
-is going to be a lookup, just dont do it in a hot loop.
+is going to be a lookup, just dont do it in a hot loop. or if you have to, use `bound` to look the logger up once.
 
 """
 
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
 from pypedream import ctx
+from pypedream.core.context import LOG
 
 logger = ctx.logger
 
+# the wrappers call this directly rather than going through ctx.logger
+_get = LOG.get
+
 
 def info(msg: str, *args, **kwargs):
     """
     log an info message
     """
-    logger().info(msg, *args, **kwargs)
+    _get().info(msg, *args, **kwargs)
 
 
 def debug(msg: str, *args, **kwargs):
     """
     log a debug message
     """
-    logger().debug(msg, *args, **kwargs)
+    _get().debug(msg, *args, **kwargs)
 
 
 def warning(msg: str, *args, **kwargs):
     """
     log a warning message
     """
-    logger().warning(msg, *args, **kwargs)
+    _get().warning(msg, *args, **kwargs)
 
 
 def error(msg: str, *args, **kwargs):
     """
     log an error message
     """
-    logger().error(msg, *args, **kwargs)
+    _get().error(msg, *args, **kwargs)
 
 
 def critical(msg: str, *args, **kwargs):
     """
     log a critical message
     """
-    logger().critical(msg, *args, **kwargs)
+    _get().critical(msg, *args, **kwargs)
 
 
 def exception(msg: str, *args, **kwargs):
     """
     log an exception message
     """
-    logger().exception(msg, *args, **kwargs)
+    _get().exception(msg, *args, **kwargs)
 
 
 def log(level, msg: str, *args, **kwargs):
     """
     log a message at the specified level
     """
-    logger().log(level, msg, *args, **kwargs)
+    _get().log(level, msg, *args, **kwargs)
+
+
+@contextmanager
+def bound(level: str = "info") -> Iterator[Callable[..., Any]]:
+    """
+    look up the logger from the context once and yield its method for `level`, for logging in a hot loop
+    without a context lookup per message. the method belongs to the logger that was current when the
+    with block was entered.
+
+    Parameters
+    ----------
+    level : str, optional
+        the name of the logging method to yield, e.g "debug", by default "info"
+
+    Yields
+    ------
+    Callable[..., Any]
+        the logger's method for `level`
+
+    Examples
+    --------
+    >>> rows = [{"id": 1}, {"id": 2}]
+    >>> with bound("debug") as debug:  # doctest: +SKIP
+    ...     for row in rows:
+    ...         debug("processing row", row=row)
+    """
+    yield getattr(_get(), level)
 
 
 __all__ = [
+    "bound",
     "logger",
     "info",
     "debug",
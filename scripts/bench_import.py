@@ -0,0 +1,47 @@
+"""
+bench_import.py measures how long a cold `import pypedream` takes.
+
+every run is a fresh interpreter so nothing is cached in sys.modules, the time reported is the cumulative time
+python's `-X importtime` reports for the pypedream package itself, so interpreter startup isn't counted.
+
+usage: python scripts/bench_import.py [runs] [module]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_time_us(module: str) -> int:
+    """
+    import `module` in a fresh interpreter and return the cumulative import time of it in microseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+    )
+    # lines look like 'import time:       self |  cumulative | name', the module itself is imported last
+    for line in reversed(result.stderr.splitlines()):
+        _, cumulative, name = line.rsplit("|", 2)
+        if name.strip() == module:
+            return int(cumulative)
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def main(runs: int = 20, module: str = "pypedream") -> None:
+    times = sorted(import_time_us(module) for _ in range(runs))
+    p99 = times[min(len(times) - 1, round(0.99 * (len(times) - 1)))]
+    print(f"import {module} ({runs} runs)")
+    print(f"  median: {statistics.median(times) / 1000:.2f} ms")
+    print(f"  p99:    {p99 / 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) if i == 0 else arg for i, arg in enumerate(sys.argv[1:])))
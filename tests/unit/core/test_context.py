@@ -0,0 +1,56 @@
+import contextvars
+
+from pypedream.core.context import (
+    CTX,
+    LOG,
+    PIPELINE,
+    STAGE,
+    VARIABLES,
+    PipelineCtx,
+    update_ctx,
+)
+from pypedream.core.logs import BASE_LOGGER
+
+
+def _in_fresh_context(fun, *args):
+    return contextvars.Context().run(fun, *args)
+
+
+def test_fields_default_to_none():
+    def check():
+        assert CTX.get() == PipelineCtx()
+        assert PIPELINE.get() is None
+        assert STAGE.get("nothing") == "nothing"
+
+    _in_fresh_context(check)
+
+
+def test_log_falls_back_to_base_logger():
+    assert _in_fresh_context(LOG.get) is BASE_LOGGER
+
+
+def test_field_set_and_reset():
+    def check():
+        token = STAGE.set("first")
+        assert STAGE.get() == "first"
+        inner = STAGE.set("second")
+        VARIABLES.set("vars")
+        STAGE.reset(inner)
+        assert STAGE.get() == "first"
+        STAGE.reset(token)
+        assert STAGE.get() is None
+        # resetting one field leaves the others alone
+        assert VARIABLES.get() == "vars"
+
+    _in_fresh_context(check)
+
+
+def test_update_ctx():
+    def check():
+        with update_ctx(stage="stage", variables="vars") as updated:
+            assert updated is CTX.get()
+            assert STAGE.get() == "stage"
+            assert VARIABLES.get() == "vars"
+        assert CTX.get() == PipelineCtx()
+
+    _in_fresh_context(check)
@@ -0,0 +1,368 @@
+import copy
+import logging
+import pickle
+import threading
+import time
+
+import pytest
+
+from pypedream.core import context
+from pypedream.core.pipelines import (
+    ExitPipeline,
+    InvalidParameterException,
+    LoggerSettings,
+    Parameters,
+    Pipeline,
+    UndefinedParameterException,
+    UndefinedVariableException,
+    Variables,
+)
+from pypedream.core.stages import Input, InputBinding
+from pypedream.input import dependency, immediate, var
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [Parameters(), Variables(), LoggerSettings(name="test"), Pipeline()],
+    ids=lambda obj: type(obj).__name__,
+)
+def test_slotted(obj):
+    assert not hasattr(obj, "__dict__")
+    assert not hasattr(obj, "__weakref__")
+
+
+def test_parameters_get():
+    params = Parameters.define(["unset"], set_=1)
+    assert params.get("set_") == 1
+    assert params.get("unset") is Parameters.UNSET_PARAMETER
+    assert params.get("unset", default="fallback") == "fallback"
+    with pytest.raises(KeyError):
+        params.get("unset", must=True)
+
+
+def test_variables_get():
+    variables = Variables.define(set_=1)
+    assert variables.get("set_") == 1
+    assert variables.get("unset") is Variables.UNSET_VARIABLE
+    assert variables.get("unset", default="fallback") == "fallback"
+    with pytest.raises(KeyError):
+        variables.get("unset", must=True)
+
+
+def test_sentinel_is_not_a_string():
+    params = Parameters.define(name="UNSET_PARAMETER")
+    assert params.get("name", must=True) == "UNSET_PARAMETER"
+
+
+def test_parameter_set_is_frozenset():
+    assert Parameters(parameter_set=["a", "b"]).parameter_set == frozenset({"a", "b"})
+    params = Parameters.define(["a"], b=1)
+    assert params.parameter_set == frozenset({"a", "b"})
+    with pytest.raises(KeyError, match=r"\['c', 'd'\]"):
+        params.sets(a=1, c=2, d=3)
+    assert "c" not in params
+
+
+def test_defaults_not_shared():
+    a, b = Parameters(), Parameters()
+    assert a.defaults is not b.defaults
+    a, b = Variables(), Variables()
+    assert a.defaults is not b.defaults
+
+
+def test_defined_defaults_are_read_only():
+    for defined in (Parameters.define(a=1), Variables.define(a=1)):
+        with pytest.raises(TypeError):
+            defined.defaults["a"] = 2
+
+
+def test_reset():
+    params = Parameters.define(["b"], a=1)
+    params.sets(a=2, b=3)
+    parameters = params.parameters
+    params.reset()
+    assert dict(params) == {"a": 1}
+    assert params.parameters is parameters
+
+    variables = Variables.define(a=1)
+    variables.sets(a=2, b=3)
+    variables.reset()
+    assert dict(variables) == {"a": 1}
+
+
+def test_run_uses_pipeline_context():
+    pipeline = Pipeline("ctx", log_settings=None)
+    seen = []
+
+    @pipeline.stage
+    def first():
+        seen.append(context.PIPELINE.get())
+
+    @pipeline.stage
+    def second():
+        seen.append(context.STAGE.get())
+
+    pipeline.run()
+    assert seen == [pipeline, pipeline.stages["second"]]
+    assert context.PIPELINE.get() is None
+
+
+def test_stage_registration():
+    pipeline = Pipeline(log_settings=None)
+
+    def fun():
+        pass
+
+    assert pipeline.stage(fun) is fun
+    assert pipeline.stage("named")(fun) is fun
+    assert pipeline.stage(name="kwarg")(fun) is fun
+    assert pipeline.stage()(fun) is fun
+    assert list(pipeline.stages) == ["fun", "named", "kwarg"]
+
+    with pytest.raises(ValueError):
+        pipeline.stage("positional", name="kwarg")
+    # an input in place of the name would otherwise be dropped silently
+    with pytest.raises(TypeError):
+        pipeline.stage(Input(as_arg="a", bind=InputBinding.immediate(1)))
+
+
+def test_stage_inputs_joined_once():
+    pipeline = Pipeline(log_settings=None)
+    first, second = immediate(1, as_arg="a"), immediate(2, as_arg="b")
+
+    @pipeline.stage("fun", first, inputs=[second])
+    def fun(a, b):
+        return a + b
+
+    assert pipeline.stages["fun"].inputs == (first, second)
+    assert pipeline.run() == {"fun": 3}
+
+
+def test_parameters_item_access():
+    params = Parameters.define(["unset"], set_=1)
+    assert params["set_"] == 1
+    with pytest.raises(UndefinedParameterException):
+        params["unset"]
+    with pytest.raises(InvalidParameterException):
+        params["undeclared"]
+    with pytest.raises(InvalidParameterException):
+        params["undeclared"] = 1
+    params["unset"] = 2
+    assert params.get("unset") == 2
+    assert "unset" in params and "undeclared" not in params
+
+
+def test_stage_error_exits_with_error_state():
+    pipeline = Pipeline(log_settings=None)
+
+    @pipeline.stage
+    def bad():
+        raise RuntimeError("bad")
+
+    with pytest.raises(ExitPipeline) as info:
+        pipeline.run_stage("bad")
+    assert info.value.error is True
+    assert info.value.args == ("Error in pipeline",)
+    assert isinstance(info.value.__cause__, RuntimeError)
+
+
+def test_run_logger_built_once():
+    settings = LoggerSettings(name="memo", stream=False, file=False)
+    pipeline = Pipeline("memo", log_settings=settings)
+    pipeline.run()
+    built = settings._built_logger
+    assert built is not None
+    pipeline.run()
+    assert settings._built_logger is built
+
+    settings.name = "memo2"
+    assert settings._built_logger is None
+
+
+def test_run_stage_does_not_leak_context():
+    pipeline = Pipeline(log_settings=None)
+
+    @pipeline.stage
+    def current():
+        return context.PIPELINE.get(), context.STAGE.get()
+
+    assert pipeline.run_stage("current") == (pipeline, pipeline.stages["current"])
+    assert context.STAGE.get() is None
+    assert pipeline.ctx[context.CTX].stage is pipeline.stages["current"]
+
+
+def test_run_stage_from_a_stage():
+    pipeline = Pipeline(log_settings=None)
+
+    @pipeline.stage
+    def inner():
+        return 1
+
+    @pipeline.stage
+    def outer():
+        return pipeline.run_stage("inner") + 1
+
+    assert pipeline.run() == {"inner": 1, "outer": 2}
+
+
+def test_mapping_views():
+    for mapping in (Parameters.define(a=1, b=2), Variables.define(a=1, b=2)):
+        assert "a" in mapping and "c" not in mapping
+        assert list(mapping.keys()) == ["a", "b"]
+        assert list(mapping.values()) == [1, 2]
+        assert dict(mapping.items()) == {"a": 1, "b": 2}
+        assert dict(mapping) == {"a": 1, "b": 2}
+
+
+def test_variables_item_access():
+    variables = Variables()
+    with pytest.raises(UndefinedVariableException):
+        variables["unset"]
+    variables["unset"] = 1
+    assert variables["unset"] == 1
+
+
+def test_run_parallel():
+    pipeline = Pipeline(log_settings=None)
+    # left and right only get past the barrier if they run at the same time
+    barrier = threading.Barrier(2, timeout=5)
+
+    @pipeline.stage("join", dependency("left", "a"), dependency("right", "b"))
+    def join(a, b):
+        return a + b, context.STAGE.get()
+
+    @pipeline.stage
+    def left():
+        barrier.wait()
+        return 1
+
+    @pipeline.stage
+    def right():
+        barrier.wait()
+        return 2
+
+    outputs = pipeline.run_parallel(max_workers=2)
+    assert outputs == {"join": (3, pipeline.stages["join"]), "left": 1, "right": 2}
+    assert list(outputs) == ["join", "left", "right"]
+
+
+def test_run_parallel_failed_dependency():
+    quiet = LoggerSettings(
+        name="quiet",
+        override_logger=logging.getLogger("quiet"),
+        nowrap_overriden=True,
+    )
+    pipeline = Pipeline(log_settings=quiet)
+
+    @pipeline.stage
+    def bad():
+        raise RuntimeError("bad")
+
+    @pipeline.stage("after", dependency("bad", "x"))
+    def after(x):
+        return x
+
+    @pipeline.stage
+    def fine():
+        return 1
+
+    assert pipeline.run_parallel() == {"fine": 1}
+    assert not pipeline.stages["after"].has_run
+
+
+def test_run_parallel_cycle():
+    pipeline = Pipeline(log_settings=None)
+    pipeline.stage("first", dependency("second", "x"))(lambda x: x)
+    pipeline.stage("second", dependency("first", "x"))(lambda x: x)
+    pipeline.stage("ok")(lambda: 1)
+
+    with pytest.raises(ValueError, match="first"):
+        pipeline.run_parallel()
+    assert not pipeline.stages["ok"].has_run
+
+
+@pytest.mark.parametrize(
+    "roundtrip",
+    [lambda e: pickle.loads(pickle.dumps(e)), copy.copy, copy.deepcopy],
+    ids=["pickle", "copy", "deepcopy"],
+)
+def test_exit_pipeline_keeps_error_state(roundtrip):
+    restored = roundtrip(ExitPipeline("x", error=True))
+    assert restored.error is True
+    assert restored.message == "x" and restored.args == ("x",)
+    assert roundtrip(ExitPipeline("y")).error is False
+
+
+def test_run_parallel_opaque_stage_table_reads_keep_order():
+    pipeline = Pipeline(log_settings=None)
+
+    @pipeline.stage
+    def slow():
+        time.sleep(0.05)
+        return 1
+
+    def slow_has_run():
+        return context.STAGES.get()["slow"].has_run
+
+    @pipeline.stage(
+        "reader", Input(as_arg="ran", bind=InputBinding.callback(slow_has_run))
+    )
+    def reader(ran):
+        return ran
+
+    assert pipeline.run_parallel() == {"slow": 1, "reader": True}
+
+    # so do immediate bindings with a mapper of their own
+    mapped = Pipeline(log_settings=None)
+    mapped.stage("slow")(slow)
+    mapped.stage(
+        "reader",
+        Input(
+            as_arg="ran",
+            bind=InputBinding.immediate(None, mapper=lambda _: slow_has_run()),
+        ),
+    )(reader)
+    assert mapped.run_parallel() == {"slow": 1, "reader": True}
+
+    # inputs that only read other context variables don't hold anything back
+    barrier = threading.Barrier(2, timeout=5)
+    independent = Pipeline(variables=Variables.define(v=1), log_settings=None)
+    independent.stage("a", var("v", "v"))(lambda v: barrier.wait() + v)
+    independent.stage("b", var("v", "v"))(lambda v: barrier.wait() + v)
+    assert sorted(independent.run_parallel(max_workers=2).values()) == [1, 2]
+
+
+def test_logger_settings_containers_are_immutable():
+    handlers = [logging.NullHandler()]
+    kwds = {"a": 1}
+    settings = LoggerSettings(name="imm", handlers=handlers, structlogkwds=kwds)
+    assert settings.handlers == tuple(handlers)
+    handlers.append(logging.NullHandler())
+    kwds["b"] = 2
+    assert len(settings.handlers) == 1 and dict(settings.structlogkwds) == {"a": 1}
+    with pytest.raises(TypeError):
+        settings.structlogkwds["b"] = 2
+
+    settings._built_logger = built = object()
+    settings.handlers = handlers
+    assert settings.handlers == tuple(handlers)
+    assert settings._built_logger is None and built is not None
+    assert LoggerSettings(name="none").handlers is None
+
+
+@pytest.mark.parametrize("cls", [Parameters, Variables])
+def test_compared_and_hashed_by_identity(cls):
+    first, second = cls(), cls()
+    assert first == first and first != second
+    assert first != {}
+    assert {first: 1, second: 2}[first] == 1
+
+
+@pytest.mark.parametrize(
+    "sentinel", [Parameters.UNSET_PARAMETER, Variables.UNSET_VARIABLE], ids=repr
+)
+def test_unset_sentinels_are_named_singletons(sentinel):
+    assert repr(sentinel) in ("UNSET_PARAMETER", "UNSET_VARIABLE")
+    assert pickle.loads(pickle.dumps(sentinel)) is sentinel
+    assert copy.deepcopy(sentinel) is sentinel
+    assert Parameters.UNSET_PARAMETER is not Variables.UNSET_VARIABLE
@@ -1,7 +1,12 @@
+import gc
+import pickle
 import random
+import sys
+import types
 from contextvars import ContextVar
 
 import pytest
+from structlog.contextvars import get_contextvars
 
 from pypedream.core.stages import (
     DEFAULT_OUTPUT_KEY,
@@ -20,6 +25,7 @@ from pypedream.core.stages import (
     PRESERVE,
     WARN_UNEXPECTED,
     _prepare_inputs_and_context,
+    must_bind,
     Input,
 )
 
@@ -256,6 +262,13 @@ def test_sequential_output_mapper(emotional_stage):
             None,
             None,
         ),
+        (
+            {"a_stage": Stage(lambda: 69)},
+            DependencyInputMapper("a_stage", required=False),
+            INPUT_NOT_FOUND,
+            None,
+            None,
+        ),
     ],
 )
 def test_dependency_input_mapper(stage_table, mapper, expected, raises, matches: str):
@@ -400,3 +413,328 @@ def test_callback_binding(sample_function, func_input, expected_output):
     assert (
         binding() == expected_output
     ), f"Callback binding failed for input {func_input}"
+
+
+def test_output_mapper_derived_state_cached():
+    mapper = SequentialOutputMapper(keys=["a", "b"], behaviour=CHILL | WARN_UNEXPECTED)
+    assert mapper._behaviours == (CHILL, WARN_UNEXPECTED)
+    assert mapper._keylen == 2
+    assert mapper == SequentialOutputMapper(
+        keys=["a", "b"], behaviour=CHILL | WARN_UNEXPECTED
+    )
+    assert KeyedOutputMapper(keys={"a": "b"})._behaviours == (STRICT,)
+    assert KeyedOutputMapper(keys={"a": "b", "c": "d"})._items == (
+        ("a", "b"),
+        ("c", "d"),
+    )
+
+
+def test_immediate_inputs_resolved_once():
+    resolved = []
+    var = ContextVar("var")
+    var.set(1)
+
+    class Source(int):
+        pass
+
+    source = Source(10)
+    stage = Stage(
+        (lambda x, y: resolved.append(x) or x + y),
+        inputs=[
+            Input(as_arg="x", bind=InputBinding.immediate(source)),
+            Input(as_arg="y", bind=InputBinding.contextual(var)),
+        ],
+    )
+    assert stage.run() == 11
+    plan = stage._input_plan
+    var.set(2)
+    assert stage.run() == 12
+    assert stage._input_plan is plan and plan[0] == {"x": source}
+    assert resolved[0] is resolved[1] is source
+
+    stage.reset()
+    assert stage._input_plan is None
+    stage.run()
+
+    stage.inputs = [
+        Input(as_arg="x", bind=InputBinding.immediate(1)),
+        *stage.inputs[1:],
+    ]
+    assert stage.run() == 3
+
+
+def test_immediate_inputs_with_mapper_resolved_every_run():
+    calls = []
+
+    def copying(x):
+        calls.append(x)
+        return list(x)
+
+    stage = Stage(
+        (lambda x: x),
+        inputs=[Input(as_arg="x", bind=InputBinding.immediate((1, 2), copying))],
+    )
+    first = stage.run()
+    first.append(3)
+    second = stage.run()
+    assert second == [1, 2] and first is not second
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        Stage(lambda: None),
+        Input(as_arg="x", bind=InputBinding.immediate(1)),
+        InputBinding.immediate(1),
+        DependencyInputMapper("stage"),
+        KeyedInputMapper("key"),
+    ],
+    ids=lambda obj: type(obj).__name__,
+)
+def test_slotted_identity_compared(obj):
+    assert not hasattr(obj, "__dict__")
+    assert obj.__class__.__eq__ is object.__eq__
+
+
+def test_later_inputs_override_earlier():
+    var = ContextVar("var")
+    var.set("deferred")
+    stage = Stage(
+        (lambda x, y: (x, y)),
+        inputs=[
+            Input(as_arg="x", bind=InputBinding.contextual(var)),
+            Input(as_arg="x", bind=InputBinding.immediate("static")),
+            Input(as_arg="y", bind=InputBinding.immediate("static")),
+            Input(as_arg="y", bind=InputBinding.contextual(var)),
+        ],
+    )
+    assert stage.run() == ("static", "deferred")
+
+
+def test_unbound_is_a_unique_sentinel():
+    assert InputBinding.immediate("UNBOUND")() == "UNBOUND"
+    assert pickle.loads(pickle.dumps(UNBOUND)) is UNBOUND
+
+
+def test_contextual_inputs_read_their_variable_once():
+    upstream = Stage(
+        lambda: {"a": 1, "b": 2},
+        output_mapper=KeyedOutputMapper({"a": "a", "b": "b"}),
+    )
+    upstream.run()
+
+    class CountedVar:
+        gets = 0
+
+        def get(self):
+            self.gets += 1
+            return {"up": upstream}
+
+    var = CountedVar()
+    stage = Stage(
+        (lambda a, b, c: a + b + c),
+        inputs=[
+            Input(
+                as_arg="a",
+                bind=InputBinding.contextual(var, DependencyInputMapper("up", "a")),
+            ),
+            Input(
+                as_arg="b",
+                bind=InputBinding.contextual(var, DependencyInputMapper("up", "b")),
+            ),
+            Input(
+                as_arg="c",
+                bind=InputBinding.contextual(
+                    var, DependencyInputMapper("up", "c", default=3, required=False)
+                ),
+            ),
+        ],
+    )
+    assert stage.run() == 6
+    assert var.gets == 1
+
+    stage.inputs = [
+        Input(as_arg="a", bind=InputBinding.contextual(var, DependencyInputMapper("x")))
+    ]
+    with pytest.raises(UnboundInputException):
+        stage.run()
+
+
+def test_keyed_output_mapper_same_length_other_keys():
+    mapper = KeyedOutputMapper(keys={"a": "x", "b": "y"})
+    assert mapper({"b": 2, "a": 1}) == {"x": 1, "y": 2}
+    with pytest.raises(ValueError):
+        mapper({"a": 1, "c": 3})
+    chill = KeyedOutputMapper(keys={"a": "x", "b": "y"}, behaviour=CHILL)
+    assert chill({"a": 1, "c": 3}) == {"x": 1}
+
+
+def test_logged_inputs_bound_only_while_running():
+    seen = []
+    stage = Stage(
+        (lambda x, y: seen.append(get_contextvars())),
+        inputs=[
+            Input(as_arg="x", bind=InputBinding.immediate(1), logged=True),
+            Input(as_arg="y", bind=InputBinding.immediate(2)),
+        ],
+    )
+    stage.run()
+    stage.inputs = [
+        Input(as_arg="x", bind=InputBinding.immediate(1)),
+        Input(as_arg="y", bind=InputBinding.immediate(2)),
+    ]
+    stage.run()
+    assert seen == [{"x": 1}, {}]
+    assert get_contextvars() == {}
+
+
+def test_nested_unbound_input_not_wrapped_twice():
+    inner = InputBinding()
+    outer = InputBinding.immediate(None, lambda _: inner())
+    with pytest.raises(UnboundInputException) as info:
+        outer()
+    assert info.value.binding is inner
+    assert isinstance(info.value.__cause__, ValueError)
+
+
+def test_stages_that_have_not_run_share_read_only_outputs():
+    first, second = Stage(lambda: 1), Stage(lambda: 2)
+    assert first.outputs == {} and first.outputs is second.outputs
+    with pytest.raises(TypeError):
+        first.outputs["x"] = 1
+
+    first.run()
+    assert first.outputs == {DEFAULT_OUTPUT_KEY: 1}
+    assert second.outputs == {}
+    first.reset()
+    assert first.outputs is second.outputs
+
+
+def test_stage_inputs_stored_as_tuple():
+    first = Input(as_arg="x", bind=InputBinding.immediate(1))
+    stage = Stage((lambda x: x), inputs=[first])
+    assert stage.inputs == (first,)
+    assert stage.run() == 1
+
+    stage.inputs = [Input(as_arg="x", bind=InputBinding.immediate(2))]
+    assert isinstance(stage.inputs, tuple)
+    assert stage.run() == 2
+    assert Stage(lambda: 1).inputs == ()
+
+
+def test_jit_compiles_once(monkeypatch):
+    compiled = []
+
+    def njit(function):
+        compiled.append(function)
+        return lambda **kwargs: function(**kwargs) * 10
+
+    monkeypatch.setitem(sys.modules, "numba", types.SimpleNamespace(njit=njit))
+
+    stage = Stage((lambda x: x + 1), inputs=[Input("x", InputBinding.immediate(1))])
+    assert stage.run() == 2
+    stage.jit = True
+    assert stage.run() == stage.run() == 20
+    assert len(compiled) == 1
+
+    stage.function = lambda x: x
+    assert stage.run() == 10
+    assert len(compiled) == 2
+
+
+def test_jit_without_numba(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numba", None)
+    with pytest.raises(ImportError, match="numba"):
+        Stage((lambda: 1), jit=True).run()
+
+
+def test_unbound_input_exception_pickles_and_drops_binding():
+    binding = InputBinding(mapper=lambda x: x[0])
+    try:
+        binding()
+    except UnboundInputException as caught:
+        e = caught
+    assert e.binding is binding
+    message = str(e)
+    assert "source=UNBOUND" in message
+
+    restored = pickle.loads(pickle.dumps(e))
+    assert str(restored) == message and restored.binding is None
+
+    # the traceback's frames reference the binding, drop them to check the exception itself doesn't
+    e.__traceback__ = e.__cause__.__traceback__ = None
+    del binding
+    gc.collect()
+    assert e.binding is None
+    assert "no longer exists" in str(e)
+
+
+def test_input_binding_subclass_call_not_bypassed():
+    class Doubled(InputBinding):
+        def __call__(self):
+            return super().__call__() * 2
+
+    var = ContextVar("var")
+    var.set(3)
+    stage = Stage(
+        (lambda x, y: (x, y)),
+        inputs=[
+            Input(as_arg="x", bind=Doubled.immediate(1)),
+            Input(as_arg="y", bind=Doubled.contextual(var)),
+        ],
+    )
+    assert stage.run() == (2, 6)
+    assert stage._input_plan[0] == {} and stage._input_plan[3] == ()
+
+
+def test_unbound_input_exception_binding_without_weakref():
+    class NoWeakref:
+        __slots__ = ("source", "mapper", "defer")
+
+        def __init__(self):
+            self.source, self.mapper, self.defer = UNBOUND, must_bind, None
+
+    binding = NoWeakref()
+    e = UnboundInputException(binding)
+    assert e.binding is binding
+    assert "source=UNBOUND" in str(e)
+
+
+def test_input_plan_sees_inputs_changed_in_place():
+    binding = InputBinding.immediate(1)
+    stage = Stage((lambda a: a), inputs=[Input(as_arg="a", bind=binding)])
+    assert stage.run() == 1
+
+    binding.source = 10
+    assert stage.run() == 10
+
+    stage.inputs[0].bind = InputBinding.immediate(20)
+    assert stage.run() == 20
+
+    stage.inputs[0].as_arg = "b"
+    with pytest.raises(TypeError):
+        stage.run()
+
+
+def test_contextual_groups_see_inputs_changed_in_place():
+    first, second = Stage(lambda: 1), Stage(lambda: 2)
+    first.run()
+    second.run()
+    table = ContextVar("table")
+    table.set({"first": first, "second": second})
+    other = ContextVar("other")
+    other.set({"second": first})
+
+    mapper = DependencyInputMapper("first")
+    binding = InputBinding.contextual(table, mapper)
+    stage = Stage((lambda x: x), inputs=[Input(as_arg="x", bind=binding)])
+    assert stage.run() == 1
+
+    # the mapper is read from the binding every run, so its fields are live
+    mapper.from_stage = "second"
+    assert stage.run() == 2
+
+    # the grouping is cached, but rebuilt when the binding is changed
+    binding.defer = other
+    assert stage.run() == 1
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# modules that `import pypedream` must not load, they are only imported when something that needs them is used
+HEAVY = (
+    "structlog",
+    "logging.handlers",
+    "pypedream.core.logs",
+    "pypedream.core.stages",
+)
+
+
+def _run(code: str, **env: str) -> None:
+    subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        env={**os.environ, "PYTHONPATH": str(ROOT), **env},
+    )
+
+
+@pytest.mark.parametrize("module", HEAVY)
+def test_import_is_lazy(module):
+    _run(f"import sys, pypedream; assert {module!r} not in sys.modules")
+
+
+def test_eager_import_resolves_everything():
+    _run(
+        "import pypedream; "
+        "missing = [n for n in pypedream.__all__ if n not in vars(pypedream)]; "
+        "assert not missing, missing",
+        PYPEDREAM_EAGER_IMPORT="1",
+    )
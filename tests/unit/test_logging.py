@@ -0,0 +1,31 @@
+from pypedream import logging as pdlog
+from pypedream.core.context import update_ctx
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.records = []
+
+    def info(self, msg, *args, **kwargs):
+        self.records.append(("info", msg, kwargs))
+
+    def debug(self, msg, *args, **kwargs):
+        self.records.append(("debug", msg, kwargs))
+
+
+def test_wrappers_use_context_logger():
+    log = RecordingLogger()
+    with update_ctx(log=log):
+        pdlog.info("hello", key=1)
+    assert log.records == [("info", "hello", {"key": 1})]
+
+
+def test_bound_looks_up_once():
+    first, second = RecordingLogger(), RecordingLogger()
+    with update_ctx(log=first):
+        with pdlog.bound("debug") as debug:
+            with update_ctx(log=second):
+                debug("row", n=1)
+                debug("row", n=2)
+    assert first.records == [("debug", "row", {"n": 1}), ("debug", "row", {"n": 2})]
+    assert second.records == []